@@ -0,0 +1,96 @@
+"""Cold-start asset loading: serial fetches vs. AssetCache.prefetch().
+
+Serves four JSON assets from a local stub HTTP server, each with its own
+artificial latency, and times fetching all of them into an empty cache one
+after another and then concurrently. Concurrent loading should take about
+as long as the slowest asset instead of the sum of all latencies.
+
+It then calls ``get()`` for an asset the server always fails, once per
+simulated rerun, and counts the requests that reach the server: with the
+failure remembered there should be one, not one per rerun.
+
+    python benchmarks/bench_asset_prefetch.py [--latencies 0.2,0.3,0.4,0.5]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forum.assets import AssetCache
+
+
+def start_stub_server(latencies, requests_seen):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            name = self.path.strip('/')
+            requests_seen[name] = requests_seen.get(name, 0) + 1
+            if name not in latencies:
+                self.send_error(503)
+                return
+            time.sleep(latencies[name])
+            body = json.dumps({'nm': name, 'layers': []}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', f'"{name}"')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latencies', default='0.2,0.3,0.4,0.5',
+                        help='comma-separated per-asset latency in seconds')
+    parser.add_argument('--deadline', type=float, default=10.0)
+    parser.add_argument('--reruns', type=int, default=1000)
+    args = parser.parse_args()
+
+    latencies = {f'asset{i}': float(s) for i, s in enumerate(args.latencies.split(','))}
+    requests_seen = {}
+    server = start_stub_server(latencies, requests_seen)
+    base = f'http://127.0.0.1:{server.server_port}/'
+    assets = {name: base + name for name in latencies}
+
+    serial_cache = AssetCache(tempfile.mkdtemp())
+    start = time.perf_counter()
+    for name, url in assets.items():
+        serial_cache.refresh(name, url)
+    serial = time.perf_counter() - start
+
+    prefetch_cache = AssetCache(tempfile.mkdtemp())
+    start = time.perf_counter()
+    results = prefetch_cache.prefetch(assets, deadline=args.deadline, wait=True)
+    concurrent = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.reruns):
+        prefetch_cache.get('broken', base + 'broken')
+        # Let the background fetch finish, as it would between reruns
+        for future in list(prefetch_cache._in_flight.values()):
+            future.result()
+    failing = time.perf_counter() - start
+    server.shutdown()
+
+    print(f"sum of latencies: {sum(latencies.values()):.2f}s, max: {max(latencies.values()):.2f}s")
+    print(f"serial fetch:     {serial:.2f}s")
+    print(f"prefetch:         {concurrent:.2f}s ({sum(r is not None for r in results.values())}/{len(assets)} loaded)")
+    print(f"failing asset:    {requests_seen.get('broken', 0)} request(s) for {args.reruns} reruns, "
+          f"{failing / args.reruns * 1e6:.1f} us/get")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""Stylesheet payload before and after forum.css_bundle.
+
+    python benchmarks/bench_css_bundle.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forum.css_bundle import bundle_css, minify_style_blocks, parse
+from forum.static_assets import StaticBundle, read_static
+
+CSS_FILES = ['forum.css']
+FRAME_FILES = ['modern_ui.html', 'theme_switcher.html', 'thread_modal.html',
+               'create_button.html', 'particles.html']
+
+
+def main():
+    raw_css = "\n".join(read_static(name) for name in CSS_FILES)
+    start = time.perf_counter()
+    css = bundle_css([raw_css])
+    elapsed = (time.perf_counter() - start) * 1e3
+    print(f"main stylesheet: {len(raw_css.encode())} -> {len(css.encode())} bytes, "
+          f"{len(parse(raw_css))} -> {len(parse(css))} top-level blocks ({elapsed:.1f} ms)")
+
+    for name in FRAME_FILES:
+        raw = read_static(name)
+        print(f"{name:>20}: {len(raw.encode())} -> {len(minify_style_blocks(raw).encode())} bytes")
+
+    raw_total = len(raw_css.encode()) + sum(len(read_static(name).encode()) for name in FRAME_FILES)
+    bundle = StaticBundle(CSS_FILES, FRAME_FILES)
+    print(f"session payload: {raw_total} bytes of sources -> {bundle.size} byte injector")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Cost of the stage timers: disabled, enabled, and traced for the panel.
+
+A rerun of app.py goes through about 25 instrumented calls (a few stages
+plus one card render and one counter per card on the page); the overhead
+is reported per call and per rerun of that shape. "disabled*" is a
+session that does not record while another session's rerun is traced, so
+every call checks its own thread instead of hitting the no-op.
+
+    python benchmarks/bench_metrics.py [--calls 200000] [--per-rerun 25]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forum.metrics import Metrics
+
+
+def time_stages(metrics, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        with metrics.stage('card_render'):
+            pass
+    return (time.perf_counter() - start) / calls
+
+
+def time_while_traced_elsewhere(calls):
+    metrics = Metrics(enabled=False)
+    started, done = threading.Event(), threading.Event()
+
+    def trace():
+        metrics.start_rerun(trace=True)
+        started.set()
+        done.wait()
+
+    tracer = threading.Thread(target=trace)
+    tracer.start()
+    started.wait()
+    metrics.start_rerun()
+    try:
+        return time_stages(metrics, calls)
+    finally:
+        done.set()
+        tracer.join()
+
+
+def time_bare(calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        pass
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=200_000)
+    parser.add_argument('--per-rerun', type=int, default=25)
+    args = parser.parse_args()
+
+    bare = time_bare(args.calls)
+    off = Metrics(enabled=False)
+    off.start_rerun()
+    on = Metrics(enabled=True)
+    on.start_rerun()
+    traced = Metrics(enabled=False)
+    traced.start_rerun(trace=True)
+
+    print(f"{args.calls} stage calls; per rerun = {args.per_rerun} calls")
+    for label, metrics in (("disabled", off), ("disabled*", None),
+                           ("enabled", on), ("traced", traced)):
+        if metrics is None:
+            cost = time_while_traced_elsewhere(args.calls) - bare
+        else:
+            cost = time_stages(metrics, args.calls) - bare
+        print(f"  {label:9s} {cost * 1e9:7.0f} ns/call  {cost * args.per_rerun * 1e6:6.1f} us/rerun")
+    start = time.perf_counter()
+    text = on.prometheus_text()
+    print(f"  prometheus_text: {(time.perf_counter() - start) * 1e6:.0f} us, {len(text)} bytes")
+
+
+if __name__ == '__main__':
+    main()
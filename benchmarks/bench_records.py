@@ -0,0 +1,81 @@
+"""Memory held by N posts as dicts vs. compact ``forum.records.Post`` records.
+
+Both forms are built from the same rows, the way posts come out of the
+database: every row has its own author and category strings, which the
+records intern. Field access speed is timed as well, since the records
+trade a C dict lookup for a slot read through ``__getitem__``.
+
+    python benchmarks/bench_records.py [--posts 1000000] [--authors 5000]
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forum.records import Post
+from forum.sanitize import sanitize_post
+from forum.storage import POST_FIELDS
+
+
+def make_rows(n_posts, n_authors):
+    rng = random.Random(42)
+    template = sanitize_post({'title': "Thread title", 'content': "Some thread content " * 10,
+                              'author': "author"})
+    for i in range(n_posts):
+        author = rng.randrange(n_authors)
+        # Fresh strings per row, like sqlite3 returns them
+        yield (str(1_000_000_000 + i), str(rng.randrange(1, 5)), template['title'],
+               template['content'], ''.join(('user_', str(author))), 1710498600000,
+               rng.randrange(100), rng.randrange(10), rng.randrange(20),
+               template['title_html'], template['preview_html'], ''.join(('user_', str(author))))
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    kept = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return kept, size
+
+
+def time_access(posts, fields=('title', 'author', 'upvotes', 'downvotes', 'comment_count')):
+    start = time.perf_counter()
+    for post in posts:
+        for field in fields:
+            post[field]
+    return (time.perf_counter() - start) / (len(posts) * len(fields)) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=1_000_000)
+    parser.add_argument('--authors', type=int, default=5000)
+    args = parser.parse_args()
+
+    dicts, dict_bytes = measure(lambda: [dict(zip(POST_FIELDS, row))
+                                         for row in make_rows(args.posts, args.authors)])
+    dict_ns = time_access(dicts)
+    del dicts
+    records, record_bytes = measure(lambda: [Post.of(dict(zip(POST_FIELDS, row)))
+                                             for row in make_rows(args.posts, args.authors)])
+    record_ns = time_access(records)
+    del records
+
+    print(f"{args.posts} posts, {args.authors} authors")
+    print(f"  dicts:   {dict_bytes / 2**20:8.1f} MiB  {dict_bytes / args.posts:6.0f} B/post  "
+          f"{dict_ns:5.1f} ns/field read")
+    print(f"  records: {record_bytes / 2**20:8.1f} MiB  {record_bytes / args.posts:6.0f} B/post  "
+          f"{record_ns:5.1f} ns/field read")
+    print(f"  saved:   {(dict_bytes - record_bytes) / 2**20:8.1f} MiB "
+          f"({1 - record_bytes / dict_bytes:.0%})")
+
+
+if __name__ == '__main__':
+    main()
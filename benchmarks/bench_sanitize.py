@@ -0,0 +1,89 @@
+"""Feed render cost: escaping at render time vs. the *_html fields escaped at write time.
+
+    python benchmarks/bench_sanitize.py [--posts 20] [--reruns 2000]
+"""
+
+import argparse
+import html
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forum.render import THREAD_CARD, thread_card_html
+from forum.sanitize import ESCAPES, PREVIEW_CHARS, escape, sanitize_post
+
+WORDS = ['forum', 'thread', '<b>bold</b>', 'a & b', '"quoted"', "it's", 'python',
+         'streamlit', '<script>', 'line\nbreak', 'emoji 🚀', 'plain', 'text']
+
+
+def make_post(rng, i):
+    return {
+        'id': str(i),
+        'title': ' '.join(rng.choices(WORDS, k=8)),
+        'content': ' '.join(rng.choices(WORDS, k=200)),
+        'author': f'user_{i}',
+        'timestamp': 1710498600000,
+        'upvotes': rng.randrange(100),
+        'comment_count': rng.randrange(20),
+    }
+
+
+# What a card costs if every rerun escapes the raw fields itself
+def render_escaping(post):
+    return THREAD_CARD.format(
+        title=html.escape(post['title']),
+        preview=html.escape(post['content'][:PREVIEW_CHARS]).replace('\n', '<br>'),
+        upvotes=post['upvotes'], comment_count=post['comment_count'],
+        author=html.escape(post['author']), timestamp=post['timestamp'])
+
+
+def time_reruns(render, posts, reruns):
+    start = time.perf_counter()
+    for _ in range(reruns):
+        for post in posts:
+            render(post)
+    return (time.perf_counter() - start) / reruns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=20, help="cards per feed page")
+    parser.add_argument('--reruns', type=int, default=2000)
+    args = parser.parse_args()
+    rng = random.Random(42)
+    posts = [make_post(rng, i) for i in range(args.posts)]
+
+    start = time.perf_counter()
+    sanitized = [sanitize_post(dict(post)) for post in posts]
+    write_us = (time.perf_counter() - start) / len(posts) * 1e6
+
+    render_us = time_reruns(render_escaping, posts, args.reruns) * 1e6
+    stored_us = time_reruns(thread_card_html, sanitized, args.reruns) * 1e6
+    print(f"{args.posts} cards per rerun")
+    print(f"  escape at render:  {render_us:8.1f} us per rerun")
+    print(f"  escaped at write:  {stored_us:8.1f} us per rerun "
+          f"(+{write_us:.1f} us once per post written)")
+
+    text = ' '.join(post['content'] for post in posts)
+    start = time.perf_counter()
+    for _ in range(args.reruns):
+        html.escape(text)
+    escape_us = (time.perf_counter() - start) / args.reruns * 1e6
+    start = time.perf_counter()
+    for _ in range(args.reruns):
+        escape(text)
+    replace_us = (time.perf_counter() - start) / args.reruns * 1e6
+    table = str.maketrans(dict(ESCAPES))
+    start = time.perf_counter()
+    for _ in range(args.reruns):
+        text.translate(table)
+    translate_us = (time.perf_counter() - start) / args.reruns * 1e6
+    print(f"  escaping {len(text)} chars: html.escape {escape_us:.1f} us, "
+          f"forum.sanitize.escape {replace_us:.1f} us, str.translate {translate_us:.1f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Search latency: SearchIndex vs. the old substring scan over every post.
+
+Word frequencies follow the vocabulary's sorted order, so the most common
+words share their first letters: "short prefix" (2 to 4 letters of the
+100 most common words) expands to many very common terms, the worst case
+for the index. ``--max-ms`` fails the run if any index query is slower;
+the target is 10 ms at a million posts.
+
+    python benchmarks/bench_search.py [--posts 1000000] [--max-ms 10]
+"""
+
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forum.search import SearchIndex
+
+SYLLABLES = "ka lo mi nu pe ra si to vu xe za bo ci de fo gu hi ja ke li mo".split()
+
+
+def make_vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def make_posts(n, vocabulary, rng):
+    # Zipf-like word frequencies, roughly what real thread text looks like
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    for i in range(n):
+        words = rng.choices(vocabulary, cum_weights=cum_weights, k=40)
+        yield {'id': str(i), 'title': " ".join(words[:6]), 'content': " ".join(words[6:])}
+
+
+# The filter app.py used before the index
+def substring_scan(posts, query):
+    query = query.lower()
+    return [post for post in posts
+            if query in post['title'].lower() or query in post['content'].lower()]
+
+
+def timed(fn, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        samples.append((time.perf_counter() - start) * 1e3)
+    return statistics.median(samples), max(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=100_000)
+    parser.add_argument('--vocabulary', type=int, default=50_000)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--max-ms', type=float, default=None)
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    vocabulary = make_vocabulary(args.vocabulary, rng)
+    posts = list(make_posts(args.posts, vocabulary, rng))
+    index = SearchIndex()
+    start = time.perf_counter()
+    for post in posts:
+        index.post_added(post)
+    print(f"indexed {len(posts)} posts in {time.perf_counter() - start:.1f}s")
+
+    rare = rng.sample(vocabulary[len(vocabulary) // 2:], args.queries)
+    mid = rng.sample(vocabulary[100:1000], args.queries)
+    top = rng.sample(vocabulary[:100], args.queries)
+    queries = {
+        'rare term': rare,
+        'common term': mid,
+        'top-100 term': top,
+        'two terms': [f"{a} {b}" for a, b in zip(mid, rare)],
+        'prefix': [word[:5] for word in rare],
+        'short prefix': sorted({word[:length] for word in vocabulary[:100] for length in (2, 3, 4)}),
+    }
+    scan_queries = rare[:max(3, args.queries // 10)]
+    scan_median, scan_max = timed(lambda q: substring_scan(posts, q), scan_queries)
+
+    print(f"{'query':>12} {'index p50 (ms)':>15} {'index max (ms)':>15}")
+    slowest = 0.0
+    for label, qs in queries.items():
+        median, worst = timed(index.search, qs)
+        slowest = max(slowest, worst)
+        print(f"{label:>12} {median:>15.2f} {worst:>15.2f}")
+    print(f"{'substring':>12} {scan_median:>15.2f} {scan_max:>15.2f}")
+    if args.max_ms is not None and slowest > args.max_ms:
+        sys.exit(f"slowest index query took {slowest:.2f} ms, over --max-ms {args.max_ms:g}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Memory for N concurrent sessions: per-session copies vs. a shared forum.
+
+Before, every session rebuilt its own list of post dicts and categories.
+Now sessions share one SharedForum and keep a SessionView overlay each.
+
+    python benchmarks/bench_session_memory.py [--sessions 1000] [--posts 1000]
+"""
+
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forum import PostStore, SessionView, SharedForum
+from forum.seed import SEED_CATEGORIES, SEED_POSTS
+from forum.storage import MemoryBackend, copy_post
+from forum.votes import UP
+
+
+def make_backend(n_posts):
+    backend = MemoryBackend()
+    backend.save_categories(SEED_CATEGORIES)
+    posts = []
+    for i in range(n_posts):
+        post = copy_post(SEED_POSTS[i % len(SEED_POSTS)])
+        post['id'] = str(i)
+        posts.append(post)
+    backend.save_posts(posts)
+    return backend
+
+
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=1000)
+    parser.add_argument('--posts', type=int, default=1000)
+    args = parser.parse_args()
+    backend = make_backend(args.posts)
+
+    def per_session_copies():
+        return [(PostStore(backend.load_posts()), backend.load_categories())
+                for _ in range(args.sessions)]
+
+    def shared_with_overlays():
+        forum = SharedForum(backend)
+        sessions = [SessionView(forum) for _ in range(args.sessions)]
+        # A handful of sessions hold a pending vote, as they would mid-rerun
+        for view in sessions[::100]:
+            view.cast_vote('0', 'bench', UP)
+        return forum, sessions
+
+    copies = measure(per_session_copies)
+    shared = measure(shared_with_overlays)
+    print(f"{args.sessions} sessions x {args.posts} posts")
+    print(f"  per-session copies: {copies / 2**20:10.1f} MiB")
+    print(f"  shared + overlays:  {shared / 2**20:10.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Static HTML/CSS/JS bytes sent per Streamlit rerun, before and after.
+
+Counts the payload strings that make up the static-asset deltas Streamlit
+sends over the websocket. Protobuf framing is a few bytes per element and
+is left out.
+
+Before: app.py re-sent every static block on every rerun, and called
+update_theme_switcher() and add_enhanced_thread_modal() twice. After: the
+StaticBundle injector is sent once per session, and later reruns send
+nothing for static assets.
+
+    python benchmarks/bench_static_payload.py [--reruns 20]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forum.static_assets import StaticBundle, read_static
+
+# Fragment -> how many times the old app.py emitted it per rerun
+LEGACY_EMITS = {
+    'modern_ui.html': 1,
+    'theme_switcher.html': 2,
+    'thread_modal.html': 2,
+    'create_button.html': 1,
+    'particles.html': 1,
+}
+
+
+def legacy_bytes_per_rerun():
+    total = sum(len(read_static(name).encode()) * count for name, count in LEGACY_EMITS.items())
+    return total + len(f"<style>{read_static('forum.css')}</style>".encode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reruns', type=int, default=20)
+    args = parser.parse_args()
+
+    bundle = StaticBundle(css_files=['forum.css'], frame_files=list(LEGACY_EMITS))
+    before = legacy_bytes_per_rerun()
+    after_first = bundle.size
+    print(f"{'':>22} {'before':>10} {'after':>10}")
+    print(f"{'first run (bytes)':>22} {before:>10} {after_first:>10}")
+    print(f"{'each rerun (bytes)':>22} {before:>10} {0:>10}")
+    print(f"{f'{args.reruns} interactions':>22} {before * (args.reruns + 1):>10} {after_first:>10}")
+
+
+if __name__ == '__main__':
+    main()
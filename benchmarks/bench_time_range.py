@@ -0,0 +1,82 @@
+"""Time-range queries over N posts: display strings vs. epoch ms vs. TimeIndex.
+
+Each query asks for the posts created in the last ``--hours`` hours:
+
+* strings: what the old ``"%Y-%m-%d %H:%M:%S"`` timestamps need, a
+  ``strptime`` per post per query;
+* epoch ms: the same scan comparing integers;
+* TimeIndex: two binary searches and a slice.
+
+The parse baseline runs over ``--parse-sample`` posts and is scaled up,
+since parsing a million strings takes several seconds per query.
+
+    python benchmarks/bench_time_range.py [--posts 1000000] [--hours 24] [--queries 20]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forum.timestamps import HOUR_MS, TimeIndex, format_ms, now_ms, to_ms
+
+
+def timed(query, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = query()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=1_000_000)
+    parser.add_argument('--days', type=int, default=365, help="span the posts are spread over")
+    parser.add_argument('--hours', type=int, default=24)
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--parse-sample', type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    now = now_ms()
+    stamps = [now - rng.randrange(args.days * 24 * HOUR_MS) for _ in range(args.posts)]
+    posts = [{'id': str(i), 'timestamp': ms} for i, ms in enumerate(stamps)]
+    strings = [format_ms(ms) for ms in stamps[:args.parse_sample]]
+    start_ms = now - args.hours * HOUR_MS
+
+    # Posts reach the index in creation order, as new posts and as rows
+    # loaded by snowflake id, so every insert lands at the end
+    start = time.perf_counter()
+    index = TimeIndex()
+    for post in sorted(posts, key=lambda post: post['timestamp']):
+        index.post_added(post)
+    build_s = time.perf_counter() - start
+
+    parse_s, _ = timed(lambda: sum(1 for s in strings if to_ms(s) >= start_ms), 1)
+    parse_s *= args.posts / len(strings)
+    scan_s, scanned = timed(lambda: [post['id'] for post in posts
+                                     if post['timestamp'] >= start_ms], args.queries)
+    index_s, page = timed(lambda: index.page(start_ms, limit=args.posts), args.queries)
+    indexed = page.items
+    assert sorted(scanned) == sorted(indexed)
+
+    recent = [posts[int(post_id)]['timestamp'] for post_id in indexed[:20]]
+    format_ms.cache_clear()
+    cold_s, _ = timed(lambda: [format_ms(ms) for ms in recent], 1)
+    warm_s, _ = timed(lambda: [format_ms(ms) for ms in recent], args.queries)
+
+    print(f"{args.posts} posts over {args.days} days; last {args.hours}h: {len(indexed)} posts")
+    print(f"  strings (strptime):  {parse_s * 1e3:10.1f} ms/query (scaled from "
+          f"{len(strings)} posts)")
+    print(f"  epoch ms scan:       {scan_s * 1e3:10.1f} ms/query")
+    print(f"  TimeIndex:           {index_s * 1e3:10.3f} ms/query "
+          f"(built in {build_s:.2f} s, incrementally in the app)")
+    print(f"  formatting a page of {len(recent)}: {cold_s * 1e6:.1f} us cold, "
+          f"{warm_s * 1e6:.1f} us cached")
+
+
+if __name__ == '__main__':
+    main()
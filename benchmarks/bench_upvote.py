@@ -0,0 +1,94 @@
+"""Upvote latency: the app's vote path vs. the old linear scan over a list of posts.
+
+The app votes through ``SessionView.toggle_vote()`` and ``commit()``, which
+checks the user's ballot in the ledger and updates the shared PostStore
+and its listeners; every call here is a new voter's upvote.
+
+    python benchmarks/bench_upvote.py [--max-posts 1000000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forum import SessionView, SharedForum
+from forum.storage import MemoryBackend
+from forum.votes import UP
+
+
+def make_posts(n):
+    return [
+        {
+            'id': str(i),
+            'category_id': str(i % 4 + 1),
+            'title': f'Post {i}',
+            'content': '',
+            'author': f'user_{i % 1000}',
+            'timestamp': 1710498600000,
+            'upvotes': 0,
+            'downvotes': 0,
+            'comment_count': 0,
+        }
+        for i in range(n)
+    ]
+
+
+# The handle_upvote implementation app.py used before PostStore
+def linear_upvote(posts, post_id):
+    for post in posts:
+        if post['id'] == post_id:
+            post['upvotes'] += 1
+            return True
+    return False
+
+
+def time_per_call(fn, ids):
+    start = time.perf_counter()
+    for post_id in ids:
+        fn(post_id)
+    return (time.perf_counter() - start) / len(ids)
+
+
+def make_forum(posts):
+    backend = MemoryBackend()
+    backend.save_posts(posts)
+    return SharedForum(backend)
+
+
+def session_upvote(view, voters):
+    # What app.py's handle_vote does for every click
+    def upvote(post_id):
+        view.toggle_vote(post_id, next(voters), UP)
+        view.commit()
+    return upvote
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-posts', type=int, default=1_000_000)
+    parser.add_argument('--calls', type=int, default=10_000)
+    args = parser.parse_args()
+
+    sizes = [n for n in (3, 1_000, 10_000, 100_000, 1_000_000) if n <= args.max_posts]
+    print(f"{'posts':>10} {'app (us)':>12} {'linear (us)':>12}")
+    for n in sizes:
+        posts = make_posts(n)
+        shared = make_forum(posts)
+        ids = [str(random.randrange(n)) for _ in range(args.calls)]
+        voters = (f'voter_{i}' for i in range(args.calls))
+        app_us = time_per_call(session_upvote(SessionView(shared), voters), ids) * 1e6
+        shared.vote_queue.close()
+        shared.comment_queue.close()
+        assert sum(post['upvotes'] for post in shared.posts) == args.calls
+        # The scan gets slow quickly, so sample fewer calls for large lists
+        linear_ids = ids[:max(10, args.calls * 1_000 // max(n, 1_000))]
+        linear_us = time_per_call(lambda post_id: linear_upvote(posts, post_id), linear_ids) * 1e6
+        print(f"{n:>10} {app_us:>12.2f} {linear_us:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
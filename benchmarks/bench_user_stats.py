@@ -0,0 +1,89 @@
+"""User stats under load: random votes, comments and thread removals, then a
+drift check against a rebuild from the stored data.
+
+Times ``--ops`` operations on a SharedForum, the full rebuild
+``check_user_stats()`` does, and a profile lookup. The correctness checks
+live in ``tests/test_user_stats.py``.
+
+    python benchmarks/bench_user_stats.py [--posts 10000] [--ops 50000] [--backend sqlite]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forum.shared import SharedForum
+from forum.storage import MemoryBackend, SQLiteBackend
+from forum.timestamps import now_ms
+
+AUTHORS = [f'user_{i}' for i in range(200)]
+
+
+def make_backend(kind, n_posts, rng):
+    if kind == 'sqlite':
+        backend = SQLiteBackend(os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    else:
+        backend = MemoryBackend()
+    now = now_ms()
+    backend.save_posts({
+        'id': str(i), 'category_id': str(i % 4 + 1), 'title': f'Post {i}', 'content': '',
+        'author': rng.choice(AUTHORS), 'timestamp': now - i * 60_000,
+        'upvotes': rng.randrange(20), 'downvotes': rng.randrange(5), 'comment_count': 0,
+    } for i in range(n_posts))
+    return backend
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=10_000)
+    parser.add_argument('--ops', type=int, default=50_000)
+    parser.add_argument('--backend', choices=('memory', 'sqlite'), default='memory')
+    args = parser.parse_args()
+    rng = random.Random(22)
+
+    shared = SharedForum(make_backend(args.backend, args.posts, rng))
+    live = [post['id'] for post in shared.posts]
+    counts = {'vote': 0, 'comment': 0, 'remove': 0}
+    start = time.perf_counter()
+    for _ in range(args.ops):
+        op = rng.choices(('vote', 'comment', 'remove'), weights=(70, 27, 3))[0]
+        i = rng.randrange(len(live))
+        post_id = live[i]
+        if op == 'vote':
+            shared.cast_votes({(post_id, rng.choice(AUTHORS)): rng.choice((1, -1, 0))})
+        elif op == 'comment':
+            shared.add_comment(post_id, rng.choice(AUTHORS), "bench comment")
+        else:
+            # Threads usually go after they collected votes and comments
+            shared.posts.remove(post_id)
+            live[i] = live[-1]
+            live.pop()
+        counts[op] += 1
+    ops_s = args.ops / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    mismatches = shared.check_user_stats()
+    check_s = time.perf_counter() - start
+
+    samples = []
+    for username in rng.choices(AUTHORS, k=10_000):
+        t = time.perf_counter()
+        shared.profile(username)
+        samples.append(time.perf_counter() - t)
+    shared.vote_queue.close()
+    shared.comment_queue.close()
+
+    print(f"{args.backend} backend, {args.posts} posts: {counts['vote']} votes, "
+          f"{counts['comment']} comments, {counts['remove']} removals ({ops_s:,.0f} ops/s)")
+    print(f"  check_user_stats(): {len(mismatches)} mismatched users, {check_s * 1e3:.1f} ms")
+    print(f"  profile():          {statistics.median(samples) * 1e6:.2f} us p50")
+
+
+if __name__ == '__main__':
+    main()
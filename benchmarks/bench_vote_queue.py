@@ -0,0 +1,63 @@
+"""Vote throughput on SQLite: one write per vote vs. the write-behind VoteQueue.
+
+    python benchmarks/bench_vote_queue.py [--votes 20000] [--posts 1000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forum.storage import SQLiteBackend
+from forum.write_behind import VoteQueue
+
+
+def make_backend(n_posts):
+    backend = SQLiteBackend(os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    backend.save_posts({
+        'id': str(i), 'category_id': '1', 'title': f'Post {i}', 'content': '',
+        'author': 'bench', 'timestamp': 1710498600000,
+        'upvotes': 0, 'downvotes': 0, 'comments': [],
+    } for i in range(n_posts))
+    return backend
+
+
+def total_votes(backend):
+    return sum(post['upvotes'] for post in backend.load_posts())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--votes', type=int, default=20_000)
+    parser.add_argument('--posts', type=int, default=1_000)
+    args = parser.parse_args()
+    rng = random.Random(7)
+    # Skewed towards a few hot threads, like real voting
+    ids = [str(min(int(rng.expovariate(1 / 50)), args.posts - 1)) for _ in range(args.votes)]
+
+    backend = make_backend(args.posts)
+    start = time.perf_counter()
+    for post_id in ids:
+        backend.apply_votes({post_id: (1, 0)})
+    direct = args.votes / (time.perf_counter() - start)
+    assert total_votes(backend) == args.votes
+
+    backend = make_backend(args.posts)
+    queue = VoteQueue(backend, flush_interval=0.5, max_pending=1000)
+    start = time.perf_counter()
+    for post_id in ids:
+        queue.vote(post_id, up=1)
+    queue.close()
+    batched = args.votes / (time.perf_counter() - start)
+    assert total_votes(backend) == args.votes
+
+    print(f"direct writes:  {direct:>12,.0f} votes/s")
+    print(f"write-behind:   {batched:>12,.0f} votes/s")
+
+
+if __name__ == '__main__':
+    main()
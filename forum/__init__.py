@@ -0,0 +1,6 @@
+"""Data layer for the ForumHub Streamlit app (app.py)."""
+
+from forum.post_store import PostStore
+from forum.shared import SessionView, SharedForum
+
+__all__ = ["PostStore", "SessionView", "SharedForum"]
@@ -0,0 +1,148 @@
+"""Columnar statistics over the posts, with NumPy and pandas.
+
+``PostColumns`` is a PostStore listener that mirrors every post as one
+row of a set of NumPy arrays: ``int64`` upvotes, downvotes and comment
+counts, ``datetime64[ms]`` creation times, and ``int32`` codes for the
+category and the author (the categorical encoding; the names live in
+small lookup lists). New posts append a row, with the arrays growing by
+doubling; votes and comments update their row in place; removed posts are
+masked out. Nothing is rebuilt from the post dicts after startup.
+
+Queries are vectorized group-bys (``np.bincount`` over the codes, pandas
+``resample`` over the times) and return pandas objects ready for
+``st.dataframe``/``st.bar_chart``.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from forum.post_store import PostListener
+
+INITIAL_CAPACITY = 1024
+
+
+class _Codes:
+    """Dense integer codes for a categorical column."""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def get(self, value):
+        return self._codes.get(value)
+
+    def code(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class PostColumns(PostListener):
+    COLUMNS = {
+        'upvotes': np.int64,
+        'downvotes': np.int64,
+        'comments': np.int64,
+        'created': 'datetime64[ms]',
+        'category': np.int32,
+        'author': np.int32,
+        'alive': np.bool_,
+    }
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        self._rows = {}   # post id -> row
+        self._size = 0
+        self._columns = {name: np.zeros(capacity, dtype=dtype)
+                         for name, dtype in self.COLUMNS.items()}
+        self._categories = _Codes()
+        self._authors = _Codes()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _grow(self):
+        capacity = len(self._columns['alive']) * 2
+        for name, column in self._columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    # PostListener
+    def post_added(self, post):
+        with self._lock:
+            if self._size == len(self._columns['alive']):
+                self._grow()
+            row = self._rows[post['id']] = self._size
+            self._size += 1
+            columns = self._columns
+            columns['upvotes'][row] = post['upvotes']
+            columns['downvotes'][row] = post['downvotes']
+            columns['comments'][row] = post.get('comment_count', 0)
+            columns['created'][row] = np.datetime64(post['timestamp'], 'ms')
+            columns['category'][row] = self._categories.code(post['category_id'])
+            columns['author'][row] = self._authors.code(post['author'])
+            columns['alive'][row] = True
+
+    def post_voted(self, post, up, down):
+        with self._lock:
+            row = self._rows.get(post['id'])
+            if row is not None:
+                self._columns['upvotes'][row] += up
+                self._columns['downvotes'][row] += down
+
+    def post_commented(self, post, comment):
+        with self._lock:
+            row = self._rows.get(post['id'])
+            if row is not None:
+                self._columns['comments'][row] += 1
+
+    def post_removed(self, post):
+        with self._lock:
+            row = self._rows.pop(post['id'], None)
+            if row is not None:
+                self._columns['alive'][row] = False
+
+    # Queries
+    def _live(self, *names):
+        """Copies of the live rows of ``names`` plus the category and author
+        names, all taken under the lock."""
+        with self._lock:
+            alive = self._columns['alive'][:self._size]
+            columns = [self._columns[name][:self._size][alive] for name in names]
+            return (*columns, list(self._categories.values), list(self._authors.values))
+
+    def author_karma(self, limit=None):
+        """Net votes on each author's posts, highest first."""
+        upvotes, downvotes, author, _, authors = self._live('upvotes', 'downvotes', 'author')
+        n = len(authors)
+        karma = np.bincount(author, weights=upvotes - downvotes, minlength=n).astype(np.int64)
+        posts = np.bincount(author, minlength=n)
+        series = pd.Series(karma, index=pd.Index(authors, name='author'), name='karma')[posts > 0]
+        series = series.sort_values(ascending=False, kind='stable')
+        return series if limit is None else series.head(limit)
+
+    def category_leaderboard(self):
+        """Posts, votes, comments and net score per category, best score first."""
+        upvotes, downvotes, comments, category, categories, _ = self._live(
+            'upvotes', 'downvotes', 'comments', 'category')
+        n = len(categories)
+        frame = pd.DataFrame({
+            'posts': np.bincount(category, minlength=n),
+            'votes': np.bincount(category, weights=upvotes + downvotes, minlength=n).astype(np.int64),
+            'comments': np.bincount(category, weights=comments, minlength=n).astype(np.int64),
+            'score': np.bincount(category, weights=upvotes - downvotes, minlength=n).astype(np.int64),
+        }, index=pd.Index(categories, name='category_id'))
+        return frame[frame['posts'] > 0].sort_values('score', ascending=False, kind='stable')
+
+    def activity(self, freq='D', category_id=None):
+        """New posts per ``freq`` bucket (any pandas offset alias, e.g. 'h', 'D', 'W')."""
+        created, category, _, _ = self._live('created', 'category')
+        if category_id is not None:
+            created = created[category == self._categories.get(category_id)]
+        counts = pd.Series(np.ones(len(created), dtype=np.int64),
+                           index=pd.DatetimeIndex(created, name='created'), name='posts')
+        return counts.resample(freq).sum()
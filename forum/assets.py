@@ -0,0 +1,198 @@
+"""Cache for remote JSON assets such as the app's Lottie animations.
+
+``AssetCache.get()`` never touches the network. It answers from memory,
+then from the on-disk cache, then from the copies bundled with the app,
+and schedules a background refresh when the entry is missing or older
+than its TTL. Refreshes are conditional GETs (``If-None-Match``) with a
+timeout. Each asset is stored as ``<name>.json`` next to a
+``<name>.meta.json`` file holding its URL, ETag and fetch time.
+
+A failed refresh (network error, timeout, bad status or body) is
+remembered for ``retry_after`` seconds. Until then ``get()`` neither
+schedules another fetch nor re-reads the disk for an asset it never found,
+so an unreachable host costs one timeout per backoff period instead of one
+per rerun.
+
+``prefetch()`` fetches a whole set of assets concurrently over one pooled
+``requests.Session``, so a cold start costs the slowest fetch rather than
+the sum of all of them, and a global deadline bounds the total wait.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_TTL = 24 * 3600
+DEFAULT_TIMEOUT = 5.0
+DEFAULT_RETRY_AFTER = 300
+DEFAULT_WORKERS = 8
+
+
+def _write_json(path, data):
+    # Write then rename so a crash never leaves a half-written cache file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class AssetCache:
+    def __init__(self, cache_dir, bundled_dir=None, ttl=DEFAULT_TTL,
+                 timeout=DEFAULT_TIMEOUT, session=None, workers=DEFAULT_WORKERS,
+                 retry_after=DEFAULT_RETRY_AFTER):
+        self.cache_dir = cache_dir
+        self.bundled_dir = bundled_dir
+        self.ttl = ttl
+        self.timeout = timeout
+        self.retry_after = retry_after
+        if session is None:
+            # Keep-alive connections shared by all fetch threads
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        self.session = session
+        os.makedirs(cache_dir, exist_ok=True)
+        self._memory = {}      # name -> (data, fetched_at)
+        self._in_flight = {}   # name -> Future
+        self._failed_at = {}   # name -> monotonic time of the last failed refresh
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='asset-fetch')
+
+    def _paths(self, name):
+        base = os.path.join(self.cache_dir, name)
+        return base + '.json', base + '.meta.json'
+
+    def get(self, name, url):
+        """Best available copy of ``name``; refreshes happen in the background."""
+        with self._lock:
+            entry = self._memory.get(name)
+        if entry is None and not self._backing_off(name):
+            entry = self._load_disk(name) or self._load_bundled(name)
+            if entry is not None:
+                with self._lock:
+                    self._memory.setdefault(name, entry)
+        if entry is None or time.time() - entry[1] >= self.ttl:
+            self.refresh_async(name, url)
+        return entry[0] if entry is not None else None
+
+    def _load_disk(self, name):
+        data_path, meta_path = self._paths(name)
+        meta = _read_json(meta_path)
+        data = _read_json(data_path) if meta is not None else None
+        return (data, meta.get('fetched_at', 0)) if data is not None else None
+
+    def _load_bundled(self, name):
+        if self.bundled_dir is None:
+            return None
+        data = _read_json(os.path.join(self.bundled_dir, name + '.json'))
+        # Bundled copies are always stale so a real fetch is attempted
+        return (data, 0) if data is not None else None
+
+    def _backing_off(self, name):
+        with self._lock:
+            failed_at = self._failed_at.get(name)
+        return failed_at is not None and time.monotonic() - failed_at < self.retry_after
+
+    def _failed(self, name):
+        with self._lock:
+            self._failed_at[name] = time.monotonic()
+
+    def refresh_async(self, name, url, timeout=None):
+        """Schedule a refresh of ``name``; returns the (possibly shared) Future.
+
+        Within ``retry_after`` seconds of a failed refresh nothing is
+        scheduled and the Future is already resolved to None.
+        """
+        if self._backing_off(name):
+            future = Future()
+            future.set_result(None)
+            return future
+        with self._lock:
+            future = self._in_flight.get(name)
+            if future is None:
+                future = self._in_flight[name] = self._executor.submit(
+                    self._refresh_and_release, name, url, timeout)
+        return future
+
+    def _refresh_and_release(self, name, url, timeout):
+        try:
+            return self.refresh(name, url, timeout)
+        finally:
+            with self._lock:
+                self._in_flight.pop(name, None)
+
+    def prefetch(self, assets, deadline=10.0, wait=False):
+        """Fetch every ``{name: url}`` in ``assets`` concurrently.
+
+        No single request may outlive ``deadline`` seconds from now. With
+        ``wait=True`` this blocks until every fetch finished or the deadline
+        passed, and returns ``{name: data or None}``; otherwise it returns
+        the futures right away.
+        """
+        expires = time.monotonic() + deadline
+        futures = {name: self.refresh_async(name, url, timeout=min(self.timeout, deadline))
+                   for name, url in assets.items()}
+        if not wait:
+            return futures
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result(timeout=max(expires - time.monotonic(), 0))
+            except FutureTimeout:
+                results[name] = None
+        return results
+
+    def refresh(self, name, url, timeout=None):
+        """Fetch ``url`` now and update the cache; returns the data or None."""
+        data = self._fetch(name, url, timeout)
+        if data is None:
+            self._failed(name)
+        return data
+
+    def _fetch(self, name, url, timeout):
+        data_path, meta_path = self._paths(name)
+        meta = _read_json(meta_path) or {}
+        headers = {}
+        if meta.get('url') == url and meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        try:
+            r = self.session.get(url, headers=headers,
+                                 timeout=self.timeout if timeout is None else timeout)
+        except requests.RequestException:
+            return None
+        now = time.time()
+        if r.status_code == 304:
+            data = _read_json(data_path)
+            if data is None:
+                return None
+        elif r.status_code == 200:
+            try:
+                data = r.json()
+            except ValueError:
+                return None
+            _write_json(data_path, data)
+            meta['etag'] = r.headers.get('ETag')
+        else:
+            return None
+        meta.update(url=url, fetched_at=now)
+        _write_json(meta_path, meta)
+        with self._lock:
+            self._memory[name] = (data, now)
+            self._failed_at.pop(name, None)
+        return data
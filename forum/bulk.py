@@ -0,0 +1,202 @@
+"""Streaming import and export of forum data.
+
+A dump is a directory with one file per kind of record, ``categories``,
+``posts``, ``comments`` and ``votes``, each either JSON Lines
+(``<kind>.jsonl``) or Parquet (``<kind>.parquet``, needs ``pyarrow``).
+Records flow through in chunks of ``chunk_size``: exports read the backend
+with keyset scans and write each chunk as it comes, imports parse one
+chunk and store it in one transaction before reading the next, so memory
+stays bounded however large the dump is.
+
+Only source fields are dumped. Escaped ``*_html`` fields and the
+``comment_count``/``reply_count`` counters are derived again on import,
+and imported votes are recorded as ballots only, since the posts'
+``upvotes``/``downvotes`` already include them. Post timestamps are
+epoch milliseconds; dumps holding the older display strings still load.
+
+Importing keeps the posts, comments and votes the database already has:
+records whose id is stored are skipped, so loading a dump twice, or into
+a database it was taken from, changes nothing.
+
+    python -m forum.bulk export --db forum.db --out dump/ [--format parquet]
+    python -m forum.bulk import --db forum.db --src dump/
+"""
+
+import argparse
+import json
+import os
+
+from forum.paging import chunked
+from forum.storage import CHUNK_SIZE, open_backend
+
+KINDS = ('categories', 'posts', 'comments', 'votes')
+FORMATS = ('jsonl', 'parquet')
+
+FIELDS = {
+    'categories': ('id', 'name', 'description', 'icon', 'color'),
+    'posts': ('id', 'category_id', 'title', 'content', 'author', 'timestamp',
+              'upvotes', 'downvotes'),
+    'comments': ('id', 'post_id', 'parent_id', 'author', 'content', 'score'),
+    'votes': ('post_id', 'user_id', 'direction'),
+}
+INTEGER_FIELDS = {'timestamp', 'upvotes', 'downvotes', 'score', 'direction'}
+
+
+def _project(records, kind):
+    fields = FIELDS[kind]
+    return [{field: record[field] for field in fields} for record in records]
+
+
+def export_chunks(backend, kind, chunk_size=CHUNK_SIZE):
+    """Chunks of ``kind`` records from ``backend``, as plain dicts."""
+    if kind == 'categories':
+        yield from chunked(_project(backend.load_categories(), kind), chunk_size)
+    elif kind == 'posts':
+        for chunk in backend.iter_posts(chunk_size):
+            yield _project(chunk, kind)
+    elif kind == 'comments':
+        for chunk in backend.iter_comments(chunk_size):
+            yield _project(chunk, kind)
+    elif kind == 'votes':
+        for chunk in backend.iter_ballots(chunk_size):
+            yield [dict(zip(FIELDS[kind], ballot)) for ballot in chunk]
+    else:
+        raise ValueError(f"unknown record kind: {kind!r}")
+
+
+def import_chunks(backend, kind, chunks):
+    """Store ``chunks`` of ``kind`` records; returns the number of records."""
+    if kind == 'categories':
+        # Categories are a short ordered list, replaced as a whole
+        categories = [category for chunk in chunks for category in chunk]
+        backend.save_categories(categories)
+        return len(categories)
+    count = 0
+    for chunk in chunks:
+        if kind == 'posts':
+            # Comment counts are rebuilt as the comments are imported
+            backend.import_posts(chunk)
+        elif kind == 'comments':
+            backend.import_comments([(comment['post_id'], comment) for comment in chunk])
+        elif kind == 'votes':
+            backend.import_ballots([(vote['post_id'], vote['user_id'], vote['direction'])
+                                    for vote in chunk])
+        else:
+            raise ValueError(f"unknown record kind: {kind!r}")
+        count += len(chunk)
+    return count
+
+
+# JSON Lines
+def write_jsonl(path, chunks):
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for chunk in chunks:
+            f.writelines(json.dumps(record, ensure_ascii=False) + '\n' for record in chunk)
+            count += len(chunk)
+    return count
+
+
+def read_jsonl(path, chunk_size=CHUNK_SIZE):
+    with open(path, encoding='utf-8') as f:
+        yield from chunked((json.loads(line) for line in f if line.strip()), chunk_size)
+
+
+# Parquet
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet dumps need pyarrow: pip install pyarrow") from None
+    return pyarrow
+
+
+def parquet_schema(kind):
+    pa = _pyarrow()
+    return pa.schema([(field, pa.int64() if field in INTEGER_FIELDS else pa.string())
+                      for field in FIELDS[kind]])
+
+
+def write_parquet(path, chunks, kind):
+    pa = _pyarrow()
+    schema = parquet_schema(kind)
+    count = 0
+    with pa.parquet.ParquetWriter(path, schema) as writer:
+        # One row group per chunk
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+            count += len(chunk)
+    return count
+
+
+def read_parquet(path, chunk_size=CHUNK_SIZE):
+    pa = _pyarrow()
+    for batch in pa.parquet.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield batch.to_pylist()
+
+
+def export_dump(backend, out_dir, fmt='jsonl', kinds=KINDS, chunk_size=CHUNK_SIZE):
+    """Write ``kinds`` from ``backend`` to ``out_dir``; returns ``{kind: count}``."""
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format: {fmt!r}")
+    os.makedirs(out_dir, exist_ok=True)
+    counts = {}
+    for kind in kinds:
+        path = os.path.join(out_dir, f"{kind}.{fmt}")
+        chunks = export_chunks(backend, kind, chunk_size)
+        if fmt == 'jsonl':
+            counts[kind] = write_jsonl(path, chunks)
+        else:
+            counts[kind] = write_parquet(path, chunks, kind)
+    return counts
+
+
+def import_dump(backend, src_dir, kinds=KINDS, chunk_size=CHUNK_SIZE):
+    """Load every ``kinds`` file found in ``src_dir``; returns ``{kind: count}``.
+
+    Kinds are imported in dependency order, so a dump can be loaded into an
+    empty database.
+    """
+    counts = {}
+    for kind in kinds:
+        for fmt in FORMATS:
+            path = os.path.join(src_dir, f"{kind}.{fmt}")
+            if os.path.exists(path):
+                reader = read_jsonl if fmt == 'jsonl' else read_parquet
+                counts[kind] = import_chunks(backend, kind, reader(path, chunk_size))
+                break
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream forum data to or from a dump directory.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    export = commands.add_parser('export', help="write the database to a dump")
+    export.add_argument('--out', required=True)
+    export.add_argument('--format', choices=FORMATS, default='jsonl')
+    load = commands.add_parser('import', help="load a dump into the database")
+    load.add_argument('--src', required=True)
+    for command in (export, load):
+        command.add_argument('--db', default=os.environ.get('FORUM_DB'),
+                             help="SQLite database (default: $FORUM_DB)")
+        command.add_argument('--kinds', nargs='+', choices=KINDS, default=list(KINDS))
+        command.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+    if not args.db:
+        parser.error("--db or FORUM_DB is required")
+
+    backend = open_backend(args.db)
+    try:
+        if args.command == 'export':
+            counts = export_dump(backend, args.out, args.format, args.kinds, args.chunk_size)
+        else:
+            counts = import_dump(backend, args.src, args.kinds, args.chunk_size)
+    finally:
+        backend.close()
+    for kind, count in counts.items():
+        print(f"{kind}: {count}")
+
+
+if __name__ == '__main__':
+    main()
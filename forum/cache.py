@@ -0,0 +1,68 @@
+"""Small thread-safe LRU cache.
+
+Entries are keyed by anything hashable; callers that cache data derived
+from a post put the post's ``version`` (see ``PostStore.version``) in the
+key, so a change to one post makes only that post's entries unreachable,
+and the LRU order evicts them eventually.
+
+The cache is bounded by entry count and, optionally, by the total
+``sizeof`` of its values; the least recently used entries go first.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LRUCache:
+    def __init__(self, max_entries=1024, max_bytes=None, sizeof=sys.getsizeof):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.size = 0
+        self._entries = OrderedDict()   # key -> (value, size)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self._entries[key] = (value, size)
+            self.size += size
+            while len(self._entries) > self.max_entries or \
+                    (self.max_bytes is not None and self.size > self.max_bytes):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+
+    def get_or_create(self, key, create):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = create()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
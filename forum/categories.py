@@ -0,0 +1,81 @@
+"""Per-category feeds and statistics, maintained incrementally.
+
+``CategoryIndex`` listens to the PostStore and keeps, for every
+``category_id``, two ``RankedSet`` rankings of its posts (``new``: by
+creation time, ``top``: by net score) and live counters of posts,
+comments and votes. A category feed page is a slice of one ranking and
+the statistics are a dict lookup, so neither depends on how many posts
+the forum holds.
+"""
+
+from collections import namedtuple
+
+from forum.paging import PAGE_SIZE, Page
+from forum.post_store import PostListener
+from forum.trending import RankedSet
+
+SORTS = ('new', 'top')
+
+CategoryStats = namedtuple('CategoryStats', ['posts', 'comments', 'votes'])
+
+
+class _Category:
+    __slots__ = ('new', 'top', 'comments', 'votes')
+
+    def __init__(self):
+        self.new = RankedSet()
+        self.top = RankedSet()
+        self.comments = 0
+        self.votes = 0
+
+
+class CategoryIndex(PostListener):
+    def __init__(self):
+        self._categories = {}   # category id -> _Category
+
+    def _category(self, category_id):
+        category = self._categories.get(category_id)
+        if category is None:
+            category = self._categories[category_id] = _Category()
+        return category
+
+    def post_added(self, post):
+        category = self._category(post['category_id'])
+        category.new.update(post['id'], post['timestamp'])
+        category.top.update(post['id'], post['upvotes'] - post['downvotes'])
+        category.comments += post.get('comment_count', 0)
+        category.votes += post['upvotes'] + post['downvotes']
+
+    def post_voted(self, post, up, down):
+        category = self._categories.get(post['category_id'])
+        if category is not None and post['id'] in category.top:
+            category.top.update(post['id'], post['upvotes'] - post['downvotes'])
+            category.votes += up + down
+
+    def post_commented(self, post, comment):
+        category = self._categories.get(post['category_id'])
+        if category is not None:
+            category.comments += 1
+
+    def post_removed(self, post):
+        category = self._categories.get(post['category_id'])
+        if category is None or post['id'] not in category.new:
+            return
+        category.new.discard(post['id'])
+        category.top.discard(post['id'])
+        category.comments -= post.get('comment_count', 0)
+        category.votes -= post['upvotes'] + post['downvotes']
+
+    def stats(self, category_id):
+        category = self._categories.get(category_id)
+        if category is None:
+            return CategoryStats(0, 0, 0)
+        return CategoryStats(len(category.new), category.comments, category.votes)
+
+    def page(self, category_id, cursor=None, limit=PAGE_SIZE, sort='new'):
+        if sort not in SORTS:
+            raise ValueError(f"unknown sort: {sort!r}")
+        category = self._categories.get(category_id)
+        if category is None:
+            return Page([], None)
+        return getattr(category, sort).page(cursor, limit)
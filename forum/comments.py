@@ -0,0 +1,128 @@
+"""Nested comment threads stored as materialized paths.
+
+Every comment has an id from ``forum.ids`` and a ``path`` made of its
+ancestors' ids and its own, joined by ``/``. Ids are fixed-width and sort
+by creation time, so:
+
+* a subtree is a contiguous range of paths, ``[path, path + '0')``
+  (``'/'`` sorts right before ``'0'``), which one index range scan finds;
+* sorting by path gives the thread in depth-first, oldest-first order;
+* ``depth`` is the number of ancestors, so depth limits are a plain filter.
+
+Each comment also keeps ``reply_count`` (direct replies), incremented as
+replies are added, and ``score``, which ``subtree()`` uses to keep only the
+best ``per_parent`` replies under each comment.
+
+Records are compact ``forum.records.Comment`` instances with dict-style
+access. ``CommentTree`` is the in-memory implementation used by
+``MemoryBackend``; ``SQLiteBackend`` stores the same fields and answers
+``subtree()`` with a single recursive query.
+"""
+
+import threading
+
+from forum.ids import new_id
+from forum.paging import COMMENT_PAGE_SIZE, page_slice
+from forum.records import Comment
+from forum.sanitize import sanitize_comment
+
+SEPARATOR = '/'
+MAX_DEPTH = 3
+PER_PARENT = 5
+
+
+def new_comment(post_id, author, content, parent=None, comment_id=None):
+    """A comment record, placed under the ``parent`` record if given."""
+    comment_id = comment_id or new_id()
+    return Comment.of(sanitize_comment({
+        'id': comment_id,
+        'post_id': post_id,
+        'parent_id': parent['id'] if parent else None,
+        'path': parent['path'] + SEPARATOR + comment_id if parent else comment_id,
+        'depth': parent['depth'] + 1 if parent else 0,
+        'author': author,
+        'content': content,
+        'score': 0,
+        'reply_count': 0,
+    }))
+
+
+class CommentTree:
+    def __init__(self):
+        self._comments = {}   # comment id -> record
+        self._roots = {}      # post id -> top-level comment ids, oldest first
+        self._children = {}   # comment id -> reply ids, oldest first
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._comments)
+
+    def add(self, post_id, comment):
+        """Store ``comment`` (a dict with ``author``, ``content`` and optionally
+        ``id``/``parent_id``/``score``); returns the stored record's copy."""
+        with self._lock:
+            parent = self._comments.get(comment.get('parent_id'))
+            if comment.get('parent_id') and parent is None:
+                raise KeyError(f"unknown parent comment: {comment['parent_id']}")
+            record = new_comment(post_id, comment['author'], comment['content'],
+                                 parent, comment.get('id'))
+            record['score'] = comment.get('score', 0)
+            self._comments[record['id']] = record
+            if parent is None:
+                self._roots.setdefault(post_id, []).append(record['id'])
+            else:
+                self._children.setdefault(parent['id'], []).append(record['id'])
+                parent['reply_count'] += 1
+            return record.copy()
+
+    def get(self, comment_id):
+        with self._lock:
+            record = self._comments.get(comment_id)
+            return record.copy() if record is not None else None
+
+    def roots_page(self, post_id, cursor=None, limit=COMMENT_PAGE_SIZE):
+        with self._lock:
+            page = page_slice(self._roots.get(post_id, []), cursor, limit)
+            return page._replace(items=[self._comments[i].copy() for i in page.items])
+
+    def subtree(self, post_id, root_id=None, max_depth=MAX_DEPTH, per_parent=PER_PARENT):
+        """Best ``per_parent`` replies per comment, ``max_depth`` levels below
+        ``root_id`` (or below the post), in display order."""
+        with self._lock:
+            if root_id is None:
+                level = self._roots.get(post_id, [])
+            else:
+                level = self._children.get(root_id, [])
+            out = []
+            self._collect(level, max_depth, per_parent, out)
+            return out
+
+    def _collect(self, ids, levels, per_parent, out):
+        if levels <= 0:
+            return
+        best = sorted((self._comments[i] for i in ids), key=lambda c: (-c['score'], c['id']))
+        for record in best[:per_parent]:
+            out.append(record.copy())
+            self._collect(self._children.get(record['id'], ()), levels - 1, per_parent, out)
+
+    def records(self):
+        """Copies of every comment, by post and then by path."""
+        with self._lock:
+            records = sorted(self._comments.values(), key=lambda c: (c['post_id'], c['path']))
+            return [record.copy() for record in records]
+
+    def counts_by_post(self):
+        with self._lock:
+            counts = {}
+            for record in self._comments.values():
+                authors = counts.setdefault(record['post_id'], {})
+                authors[record['author']] = authors.get(record['author'], 0) + 1
+            return counts
+
+    def remove_post(self, post_id):
+        with self._lock:
+            stack = list(self._roots.pop(post_id, ()))
+            while stack:
+                comment_id = stack.pop()
+                self._comments.pop(comment_id, None)
+                stack.extend(self._children.pop(comment_id, ()))
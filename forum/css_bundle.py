@@ -0,0 +1,234 @@
+"""Deduplicate and minify stylesheets.
+
+The app's CSS grew by pasting: ``.thread-card``, ``.category-card`` and
+``.stButton>button`` are declared several times, and the widget iframes
+repeat ``@keyframes``. ``bundle_css()`` parses the fragments, drops what
+can never apply, and prints the result without comments or whitespace:
+
+* a declaration is dropped when a later rule with the same selector, in
+  the same ``@media``/``@supports`` context, sets the same property with
+  at least the same importance (it would always lose the cascade);
+  repeats inside one rule are kept, since those are usually fallbacks;
+* rules left without declarations are dropped;
+* only the last ``@keyframes`` of a given name is kept, as in browsers.
+
+Run ``python -m forum.css_bundle static/forum.css`` to write a
+content-hashed ``static/build/forum.<hash>.min.css`` and print the savings.
+"""
+
+import argparse
+import hashlib
+import os
+import re
+from collections import namedtuple
+
+Rule = namedtuple('Rule', ['selector', 'declarations'])
+Declaration = namedtuple('Declaration', ['prop', 'value', 'important'])
+AtRule = namedtuple('AtRule', ['prelude', 'children'])   # children None for "@import ...;"
+# An AtRule's children are Rules and AtRules, or Declarations for @font-face and @page
+
+COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+SPACE_RE = re.compile(r"\s+")
+STRING_RE = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')""")
+COMBINATOR_RE = re.compile(r"\s*([>+~,])\s*")
+IMPORTANT_RE = re.compile(r"\s*!\s*important\s*$", re.I)
+STYLE_BLOCK_RE = re.compile(r"(<style[^>]*>)(.*?)(</style>)", re.S | re.I)
+
+
+def _scan(text, i, stops):
+    """Index of the first char in ``stops`` at depth 0 outside strings."""
+    depth = 0
+    quote = None
+    while i < len(text):
+        c = text[i]
+        if quote:
+            if c == '\\':
+                i += 1
+            elif c == quote:
+                quote = None
+        elif c in '"\'':
+            quote = c
+        elif c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        elif depth == 0 and c in stops:
+            return i
+        i += 1
+    return i
+
+
+def _parse_declarations(text):
+    declarations = []
+    i = 0
+    while i < len(text):
+        end = _scan(text, i, ';')
+        chunk = text[i:end].strip()
+        i = end + 1
+        if ':' not in chunk:
+            continue
+        prop, value = chunk.split(':', 1)
+        important = bool(IMPORTANT_RE.search(value))
+        value = IMPORTANT_RE.sub('', value).strip()
+        declarations.append(Declaration(prop.strip().lower(), value, important))
+    return declarations
+
+
+def _parse_block(text, i):
+    nodes = []
+    while True:
+        while i < len(text) and text[i].isspace():
+            i += 1
+        if i >= len(text) or text[i] == '}':
+            return nodes, i + 1
+        end = _scan(text, i, '{;}')
+        prelude = text[i:end].strip()
+        if end >= len(text):
+            # Stray text without a block; skip it
+            i = end
+            continue
+        if text[end] in ';}':
+            if prelude.startswith('@'):
+                nodes.append(AtRule(prelude, None))
+            else:
+                # Declarations of a @font-face or @page block; the last one
+                # may end at the '}' without a ';'
+                nodes.extend(_parse_declarations(prelude))
+            i = end + 1 if text[end] == ';' else end
+        elif prelude.startswith('@'):
+            children, i = _parse_block(text, end + 1)
+            nodes.append(AtRule(prelude, children))
+        else:
+            close = _scan(text, end + 1, '}')
+            nodes.append(Rule(prelude, _parse_declarations(text[end + 1:close])))
+            i = close + 1
+
+
+def parse(css):
+    return _parse_block(COMMENT_RE.sub('', css), 0)[0]
+
+
+def _is_keyframes(node):
+    return isinstance(node, AtRule) and node.children is not None and \
+        node.prelude.lower().lstrip('@').split()[0].endswith('keyframes')
+
+
+def dedupe(nodes):
+    # Last @keyframes of each name wins
+    last_keyframes = {}
+    for index, node in enumerate(nodes):
+        if _is_keyframes(node):
+            last_keyframes[_minify_prelude(node.prelude)] = index
+    nodes = [node for index, node in enumerate(nodes)
+             if not _is_keyframes(node) or last_keyframes[_minify_prelude(node.prelude)] == index]
+
+    # Walk backwards so every declaration can see the rules after it
+    later = {}   # selector -> {prop: important}
+    result = []
+    for node in reversed(nodes):
+        if isinstance(node, Declaration):
+            result.append(node)
+            continue
+        if isinstance(node, AtRule):
+            if node.children is not None and not _is_keyframes(node):
+                node = node._replace(children=dedupe(node.children))
+            result.append(node)
+            continue
+        selector = _minify_selector(node.selector)
+        seen = later.setdefault(selector, {})
+        kept = [d for d in node.declarations
+                if not (d.prop in seen and (seen[d.prop] or not d.important))]
+        for d in kept:
+            seen[d.prop] = seen.get(d.prop, False) or d.important
+        if kept:
+            result.append(Rule(selector, kept))
+    result.reverse()
+    return result
+
+
+def _outside_strings(text, minify):
+    # Quoted strings, e.g. in url("...") or [title="a > b"], are kept verbatim
+    parts = STRING_RE.split(text)
+    for i in range(0, len(parts), 2):
+        parts[i] = minify(SPACE_RE.sub(' ', parts[i]))
+    return ''.join(parts).strip()
+
+
+def _minify_value(value):
+    return _outside_strings(value, lambda part: re.sub(r"\s*,\s*", ',', part))
+
+
+def _minify_selector(selector):
+    return _outside_strings(selector, lambda part: COMBINATOR_RE.sub(r"\1", part))
+
+
+def _minify_prelude(prelude):
+    return _outside_strings(prelude, lambda part: re.sub(r"\s*:\s*", ':', part))
+
+
+def _serialize_declaration(d):
+    return f"{d.prop}:{_minify_value(d.value)}" + ('!important' if d.important else '')
+
+
+def serialize(nodes):
+    out = []
+    for node in nodes:
+        if isinstance(node, Rule):
+            body = ';'.join(_serialize_declaration(d) for d in node.declarations)
+            out.append(f"{_minify_selector(node.selector)}{{{body}}}")
+        elif isinstance(node, Declaration):
+            out.append(_serialize_declaration(node) + ';')
+        elif node.children is None:
+            out.append(_minify_value(node.prelude) + ';')
+        else:
+            body = serialize(node.children)
+            if body.endswith(';'):
+                # The last statement of a block needs no ';'
+                body = body[:-1]
+            out.append(f"{_minify_prelude(node.prelude)}{{{body}}}")
+    return ''.join(out)
+
+
+def bundle_css(fragments):
+    """One deduplicated, minified stylesheet from ``fragments`` (in cascade order)."""
+    nodes = []
+    for css in fragments:
+        nodes.extend(parse(css))
+    # @import is only valid before every other rule
+    imports = [n for n in nodes if isinstance(n, AtRule) and n.children is None
+               and n.prelude.lower().startswith('@import')]
+    rest = [n for n in nodes if not any(n is imp for imp in imports)]
+    return serialize(imports + dedupe(rest))
+
+
+def minify_style_blocks(html):
+    """Bundle every ``<style>`` block of an HTML fragment in place."""
+    return STYLE_BLOCK_RE.sub(lambda m: m.group(1) + bundle_css([m.group(2)]) + m.group(3), html)
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode()).hexdigest()[:12]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bundle stylesheets into one hashed, minified file.")
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('-o', '--out-dir', default=os.path.join('static', 'build'))
+    parser.add_argument('--name', default='forum')
+    args = parser.parse_args()
+
+    fragments = []
+    for path in args.files:
+        with open(path, encoding='utf-8') as f:
+            fragments.append(f.read())
+    css = bundle_css(fragments)
+    os.makedirs(args.out_dir, exist_ok=True)
+    path = os.path.join(args.out_dir, f"{args.name}.{content_hash(css)}.min.css")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(css)
+    before = sum(len(fragment.encode()) for fragment in fragments)
+    print(f"{path}: {before} -> {len(css.encode())} bytes")
+
+
+if __name__ == '__main__':
+    main()
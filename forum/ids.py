@@ -0,0 +1,142 @@
+"""Snowflake-style post ids.
+
+An id packs three fields into a 63-bit integer::
+
+    | 41 bits: ms since EPOCH_MS | 10 bits: worker | 12 bits: sequence |
+
+and is rendered as a zero-padded 19 digit string, so sorting ids as strings
+sorts them by creation time, and the last id of a page is a stable
+pagination cursor. ``lower_bound(ts_ms)`` is the smallest id issued at or
+after ``ts_ms``, so posts created in a time range are a range of ids.
+The seed posts use ids in the same format; shorter ids in databases
+seeded before that sort after every snowflake id.
+
+Ids are unique across threads (a lock guards the sequence) and across
+processes: before its first id, each process claims a worker id by taking
+an exclusive ``flock`` on ``<n>.lock`` in ``FORUM_WORKER_DIR`` (default: a
+``forum-workers`` directory under the system temp dir). The kernel drops
+the lock when the process exits, so crashed processes leave no stale
+claims, and forked children claim a worker of their own. Setting
+``FORUM_WORKER_ID`` pins the worker instead; it is still locked, so a
+second process started with the same value fails instead of issuing
+duplicate ids. Hosts that don't share the lock directory need disjoint
+``FORUM_WORKER_ID`` values.
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+
+TIMESTAMP_BITS = 41
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+
+MAX_WORKER = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+WORKER_SHIFT = SEQUENCE_BITS
+TIMESTAMP_SHIFT = SEQUENCE_BITS + WORKER_BITS
+
+ID_WIDTH = 19
+
+
+def default_lease_dir():
+    return os.environ.get('FORUM_WORKER_DIR') or os.path.join(tempfile.gettempdir(), 'forum-workers')
+
+
+def claim_worker_id(worker_id=None, lease_dir=None):
+    """Lock ``worker_id``, or the lowest free worker id, for this process.
+
+    Returns ``(worker_id, lease)``; the claim lasts as long as ``lease``
+    (an open file) does. Raises RuntimeError if the id is taken.
+    """
+    if worker_id is not None and not 0 <= worker_id <= MAX_WORKER:
+        raise ValueError(f"worker_id must be in [0, {MAX_WORKER}]")
+    if fcntl is None:
+        if worker_id is None:
+            raise RuntimeError("worker ids can't be allocated on this platform; "
+                               "set FORUM_WORKER_ID to a value unique to this process")
+        return worker_id, None
+    lease_dir = lease_dir or default_lease_dir()
+    os.makedirs(lease_dir, exist_ok=True)
+    for candidate in range(MAX_WORKER + 1) if worker_id is None else (worker_id,):
+        lease = open(os.path.join(lease_dir, f"{candidate}.lock"), 'a')
+        try:
+            fcntl.flock(lease, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lease.close()
+            continue
+        return candidate, lease
+    if worker_id is not None:
+        raise RuntimeError(f"worker id {worker_id} is in use by another process "
+                           f"(lock in {lease_dir})")
+    raise RuntimeError(f"all {MAX_WORKER + 1} worker ids are in use (locks in {lease_dir})")
+
+
+def format_id(value):
+    return str(value).zfill(ID_WIDTH)
+
+
+def lower_bound(ts_ms):
+    """Smallest id that could have been generated at or after ``ts_ms``."""
+    return format_id(max(ts_ms - EPOCH_MS, 0) << TIMESTAMP_SHIFT)
+
+
+class IdGenerator:
+    def __init__(self, worker_id=None, lease_dir=None):
+        self._explicit_worker = worker_id
+        self._lease_dir = lease_dir
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # The worker is claimed on first use, so importing this module
+        # never touches the lock directory
+        self.worker_id = None
+        self._lease = None
+        self._last_ms = -1
+        self._sequence = 0
+
+    def _claim(self):
+        worker_id = self._explicit_worker
+        if worker_id is None and os.environ.get('FORUM_WORKER_ID') is not None:
+            worker_id = int(os.environ['FORUM_WORKER_ID'])
+        self.worker_id, self._lease = claim_worker_id(worker_id, self._lease_dir)
+
+    def next_int(self):
+        with self._lock:
+            if self.worker_id is None:
+                self._claim()
+            now = time.time_ns() // 1_000_000 - EPOCH_MS
+            if now > self._last_ms:
+                self._last_ms = now
+                self._sequence = 0
+            else:
+                # Same millisecond, or the wall clock stepped backwards: keep
+                # counting from the last timestamp so ids stay monotonic.
+                self._sequence += 1
+                if self._sequence > MAX_SEQUENCE:
+                    self._last_ms += 1
+                    self._sequence = 0
+            return (self._last_ms << TIMESTAMP_SHIFT) | (self.worker_id << WORKER_SHIFT) | self._sequence
+
+    def __call__(self):
+        return format_id(self.next_int())
+
+
+_default = IdGenerator()
+
+if hasattr(os, 'register_at_fork'):
+    # A forked child must claim its own worker id rather than reuse the parent's
+    os.register_at_fork(after_in_child=lambda: _default._reset())
+
+
+def new_id():
+    return _default()
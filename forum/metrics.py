@@ -0,0 +1,219 @@
+"""Timers and counters for the app's hot paths.
+
+``Metrics`` keeps, per stage name, the number of timings, their total and
+their maximum, plus plain counters and gauges (callables read at export
+time, e.g. cache sizes). app.py wraps each stage of a rerun in
+``metrics.stage(name)``.
+
+Recording is on for every session when ``enabled`` is set, and for a
+single rerun when it is started with ``start_rerun(trace=True)``; traced
+reruns also collect a per-stage breakdown for the developer panel. Traces
+are kept per thread, since every Streamlit session reruns on its own
+thread.
+
+While nothing records (not enabled, and no live thread tracing),
+``stage`` and ``count`` are bound to module-level no-ops: a timed block
+costs one call plus a ``with`` on a shared null context manager. While
+some thread traces, every call first checks whether its own thread
+records. When it does, a stage costs two ``perf_counter()`` calls and a
+short locked update. ``benchmarks/bench_metrics.py`` has the figures.
+
+``prometheus_text()`` renders everything in the Prometheus text exposition
+format; ``write_textfile()`` writes it atomically, for node_exporter's
+textfile collector or any scraper that reads files.
+"""
+
+import os
+import threading
+import time
+from time import perf_counter
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_STAGE = _NullStage()
+
+
+def _null_stage(name):
+    return NULL_STAGE
+
+
+def _null_count(name, n=1):
+    pass
+
+
+class _Stage:
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, perf_counter() - self.start)
+        return False
+
+
+class _RerunState(threading.local):
+    # Class attributes are the defaults on threads that never started a rerun
+    breakdown = None
+    started = None
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metrics:
+    def __init__(self, enabled=False, prefix='forum'):
+        self.prefix = prefix
+        self._stages = {}     # name -> [count, total seconds, max seconds]
+        self._counters = {}   # name -> value
+        self._gauges = {}     # name -> (read, help)
+        self._lock = threading.Lock()
+        self._local = _RerunState()
+        self._tracing = set()   # threads whose current rerun is traced
+        self._written_at = 0.0
+        self.enabled = enabled
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, enabled):
+        with self._lock:
+            self._enabled = enabled
+            self._bind()
+
+    def _bind(self):
+        # ``stage`` and ``count`` are instance attributes, rebound whenever
+        # recording starts or stops anywhere; caller holds the lock
+        if self._enabled or self._tracing:
+            self.stage, self.count = self._stage, self._count
+        else:
+            self.stage, self.count = _null_stage, _null_count
+
+    # Recording
+    @property
+    def recording(self):
+        return self._enabled or self._local.breakdown is not None
+
+    def _stage(self, name):
+        """Context manager timing one run of stage ``name``."""
+        if self._enabled or self._local.breakdown is not None:
+            return _Stage(self, name)
+        return NULL_STAGE
+
+    def observe(self, name, seconds):
+        with self._lock:
+            stats = self._stages.get(name)
+            if stats is None:
+                stats = self._stages[name] = [0, 0.0, 0.0]
+            stats[0] += 1
+            stats[1] += seconds
+            if seconds > stats[2]:
+                stats[2] = seconds
+        breakdown = self._local.breakdown
+        if breakdown is not None:
+            breakdown[name] = breakdown.get(name, 0.0) + seconds
+
+    def _count(self, name, n=1):
+        if not (self._enabled or self._local.breakdown is not None):
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def gauge(self, name, read, help=''):
+        """Report ``read()`` as gauge ``name`` at export time."""
+        with self._lock:
+            self._gauges[name] = (read, help)
+
+    # Per-rerun breakdown
+    def start_rerun(self, trace=False):
+        """Start a rerun on this thread; ``trace`` records it and collects a
+        per-stage breakdown even when the metrics are not enabled."""
+        self._local.breakdown = {} if trace else None
+        self._local.started = perf_counter()
+        if trace or self._tracing:
+            thread = threading.current_thread()
+            with self._lock:
+                # Also forget threads that died mid-trace, e.g. on a rerun
+                # cut short by st.rerun(), so the no-ops come back
+                self._tracing = {t for t in self._tracing if t is not thread and t.is_alive()}
+                if trace:
+                    self._tracing.add(thread)
+                self._bind()
+
+    def rerun_breakdown(self):
+        """``({stage: seconds}, seconds since start_rerun())`` for this thread."""
+        started = self._local.started
+        elapsed = perf_counter() - started if started is not None else 0.0
+        return dict(self._local.breakdown or {}), elapsed
+
+    # Reading
+    def snapshot(self):
+        with self._lock:
+            stages = {name: tuple(stats) for name, stats in self._stages.items()}
+            counters = dict(self._counters)
+            gauges = list(self._gauges.items())
+        return {
+            'stages': stages,
+            'counters': counters,
+            'gauges': {name: read() for name, (read, _) in gauges},
+        }
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+    def prometheus_text(self):
+        snapshot = self.snapshot()
+        with self._lock:
+            helps = {name: help for name, (_, help) in self._gauges.items()}
+        prefix = self.prefix
+        lines = []
+        if snapshot['stages']:
+            name = f"{prefix}_stage_seconds"
+            lines += [f"# HELP {name} Time spent in each app stage.",
+                      f"# TYPE {name} summary"]
+            for stage, (count, total, _) in sorted(snapshot['stages'].items()):
+                lines.append(f'{name}_sum{{stage="{_label(stage)}"}} {total:.9f}')
+                lines.append(f'{name}_count{{stage="{_label(stage)}"}} {count}')
+            lines += [f"# HELP {name}_max Longest single run of each app stage.",
+                      f"# TYPE {name}_max gauge"]
+            for stage, (_, _, longest) in sorted(snapshot['stages'].items()):
+                lines.append(f'{name}_max{{stage="{_label(stage)}"}} {longest:.9f}')
+        for counter, value in sorted(snapshot['counters'].items()):
+            lines += [f"# TYPE {prefix}_{counter}_total counter",
+                      f"{prefix}_{counter}_total {value}"]
+        for gauge, value in sorted(snapshot['gauges'].items()):
+            if helps.get(gauge):
+                lines.append(f"# HELP {prefix}_{gauge} {helps[gauge]}")
+            lines += [f"# TYPE {prefix}_{gauge} gauge", f"{prefix}_{gauge} {value}"]
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path, min_interval=5.0):
+        """Write ``prometheus_text()`` to ``path``, at most every ``min_interval`` seconds."""
+        now = time.monotonic()
+        if now - self._written_at < min_interval:
+            return False
+        self._written_at = now
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, path)
+        return True
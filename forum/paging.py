@@ -0,0 +1,35 @@
+"""Cursor pagination for the thread feed.
+
+A ``Page`` carries the items to render and the cursor for the following
+page (``None`` on the last page). Ranked feeds use the last ranking key as
+the cursor, so the next page resumes right after it even if posts were
+added or re-ranked ahead of it in the meantime. Plain result lists (search
+hits, category listings) use the offset of the next item, and comment
+threads use whatever the storage backend finds cheapest to resume from.
+
+``chunked`` cuts any iterable into lists of bounded size, for bulk reads
+and writes that must not hold a whole table in memory.
+"""
+
+from collections import namedtuple
+from itertools import islice
+
+PAGE_SIZE = 20
+COMMENT_PAGE_SIZE = 10
+
+Page = namedtuple('Page', ['items', 'next_cursor'])
+
+
+def page_slice(items, cursor=None, limit=PAGE_SIZE):
+    start = cursor or 0
+    end = start + limit
+    return Page(items[start:end], end if end < len(items) else None)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,152 @@
+"""Indexed in-memory post store.
+
+Posts are kept in a dict keyed by post id, with secondary indexes by
+``category_id`` and author, so lookups, votes and deletes are O(1) no
+matter how many threads exist. The store also behaves like the plain list
+app.py used to keep in ``st.session_state.posts``: it can be iterated,
+sorted, measured with ``len`` and appended to.
+
+Derived indexes (search, rankings, ...) register a ``PostListener`` with
+``subscribe()`` and are notified of every change while the store's lock is
+held, so they never drift out of sync with the posts.
+
+Posts are stored as compact ``forum.records.Post`` records; dicts passed
+to ``append()`` are converted, and the records keep dict-style access.
+
+Every change to a post bumps its ``version``, so caches of anything
+rendered from one post can be keyed by ``(post_id, version)`` and go
+stale for that post alone.
+"""
+
+import threading
+
+from forum.records import Post
+
+
+class PostListener:
+    def post_added(self, post):
+        pass
+
+    def post_voted(self, post, up, down):
+        pass
+
+    def post_commented(self, post, comment):
+        pass
+
+    def post_removed(self, post):
+        pass
+
+
+class PostStore:
+    def __init__(self, posts=()):
+        self._posts = {}
+        self._by_category = {}
+        self._by_author = {}
+        self._versions = {}
+        self._listeners = []
+        self._lock = threading.RLock()
+        self.extend(posts)
+
+    def subscribe(self, listener):
+        """Register ``listener`` and replay the posts already stored."""
+        with self._lock:
+            self._listeners.append(listener)
+            for post in self._posts.values():
+                listener.post_added(post)
+
+    # List-style API used by app.py
+    def __len__(self):
+        return len(self._posts)
+
+    def __iter__(self):
+        # Iterate over a snapshot so concurrent writers can't break readers
+        with self._lock:
+            return iter(list(self._posts.values()))
+
+    def __contains__(self, post_id):
+        return post_id in self._posts
+
+    def __getitem__(self, post_id):
+        return self._posts[post_id]
+
+    def append(self, post):
+        post = Post.of(post)
+        with self._lock:
+            post_id = post['id']
+            if post_id in self._posts:
+                raise ValueError(f"duplicate post id: {post_id}")
+            self._posts[post_id] = post
+            self._by_category.setdefault(post['category_id'], {})[post_id] = None
+            self._by_author.setdefault(post['author'], {})[post_id] = None
+            for listener in self._listeners:
+                listener.post_added(post)
+
+    def extend(self, posts):
+        for post in posts:
+            self.append(post)
+
+    # Lookups
+    def get(self, post_id, default=None):
+        return self._posts.get(post_id, default)
+
+    def in_category(self, category_id):
+        with self._lock:
+            ids = list(self._by_category.get(category_id, ()))
+        return [self._posts[post_id] for post_id in ids]
+
+    def by_author(self, author):
+        with self._lock:
+            ids = list(self._by_author.get(author, ()))
+        return [self._posts[post_id] for post_id in ids]
+
+    def version(self, post_id):
+        return self._versions.get(post_id, 0)
+
+    def _touch(self, post_id):
+        self._versions[post_id] = self._versions.get(post_id, 0) + 1
+
+    # Mutations
+    def vote(self, post_id, up=0, down=0):
+        with self._lock:
+            post = self._posts.get(post_id)
+            if post is None:
+                return False
+            post['upvotes'] += up
+            post['downvotes'] += down
+            self._touch(post_id)
+            for listener in self._listeners:
+                listener.post_voted(post, up, down)
+            return True
+
+    def add_comment(self, post_id, comment):
+        """Count a new comment on ``post_id``; the comment itself is stored elsewhere."""
+        with self._lock:
+            post = self._posts.get(post_id)
+            if post is None:
+                return False
+            post['comment_count'] = post.get('comment_count', 0) + 1
+            self._touch(post_id)
+            for listener in self._listeners:
+                listener.post_commented(post, comment)
+            return True
+
+    def remove(self, post_id):
+        with self._lock:
+            post = self._posts.pop(post_id, None)
+            if post is None:
+                return None
+            self._discard(self._by_category, post['category_id'], post_id)
+            self._discard(self._by_author, post['author'], post_id)
+            self._touch(post_id)
+            for listener in self._listeners:
+                listener.post_removed(post)
+            return post
+
+    @staticmethod
+    def _discard(index, key, post_id):
+        bucket = index.get(key)
+        if bucket is None:
+            return
+        bucket.pop(post_id, None)
+        if not bucket:
+            del index[key]
@@ -0,0 +1,43 @@
+"""Cached HTML fragments for the feed.
+
+A thread card only depends on its post, so ``CardRenderer`` memoizes the
+rendered HTML per ``(post_id, version)``. Votes and comments bump the
+post's version (``SessionView.version``), which leaves the old fragment
+to age out of the LRU while every other card stays cached. The cache is
+bounded both by entry count and by the memory held by the fragments.
+
+Cards are built from the ``*_html`` fields escaped at write time (see
+``forum.sanitize``), so rendering does no escaping; the timestamp is
+formatted from its epoch milliseconds by the memoized ``format_ms``.
+"""
+
+from forum.cache import LRUCache
+from forum.timestamps import format_ms
+
+THREAD_CARD = """
+            <div class="thread-card">
+                <h3>{title}</h3>
+                <p>{preview}...</p>
+                <div class="thread-meta">
+                    <button class="upvote-button" onclick="handleUpvote(this)">🔼 {upvotes} Upvotes</button>
+                    <span>💬 {comment_count} Comments</span>
+                    <span>👤 {author}</span>
+                    <span>🕒 {timestamp}</span>
+                </div>
+            </div>
+        """
+
+
+def thread_card_html(post):
+    return THREAD_CARD.format(
+        title=post['title_html'], preview=post['preview_html'],
+        upvotes=post['upvotes'], comment_count=post['comment_count'],
+        author=post['author_html'], timestamp=format_ms(post['timestamp']))
+
+
+class CardRenderer:
+    def __init__(self, max_entries=4096, max_bytes=8 << 20):
+        self.cache = LRUCache(max_entries, max_bytes)
+
+    def render(self, post, version):
+        return self.cache.get_or_create((post['id'], version), lambda: thread_card_html(post))
@@ -0,0 +1,269 @@
+"""Inverted full-text index over post titles and contents.
+
+Each term maps to two parallel ``array`` posting lists: internal document
+numbers (in insertion order, so always sorted) and term frequencies. That
+keeps a posting at 6 bytes instead of a Python object per entry. Terms are
+also kept in a sorted vocabulary so a query token matches every term it is
+a prefix of ("prog" finds "programming").
+
+Queries are conjunctive: every token has to match the post, like the old
+substring filter. Hits are ranked with BM25, and title terms count double.
+A token expands to at most ``max_expansions`` terms, the exact term and
+then the most frequent ones, and scores as its best-matching term, so a
+post is not ranked up for using many words that share a prefix. The index
+is a ``PostListener``, so the PostStore keeps it up to date as posts are
+created or removed.
+
+Postings are also grouped in blocks of ``BLOCK_SIZE``, each with its
+largest term frequency and shortest document, which bound the BM25 score
+of any posting in the block. A single-token query takes the top ``limit``
+of each of its terms in turn, best bound first: blocks are visited in
+order of their bound and the scan stops at the first one that cannot beat
+the ``limit`` best posts found so far, and a term whose best block cannot
+is skipped entirely. A very common term, or a short prefix of many, only
+scores a few blocks. Multi-token queries are not pruned, since a partial
+score says nothing about a post until every token has matched it; they
+intersect from the most selective token instead and only rank the
+survivors.
+"""
+
+import heapq
+import math
+import re
+from array import array
+from bisect import bisect_left, insort
+from itertools import compress
+
+from forum.post_store import PostListener
+
+TOKEN_RE = re.compile(r"[^\W_]+")
+TITLE_WEIGHT = 2
+BLOCK_SIZE = 128
+# Prefix matches looked at when expanding a token, so a one-letter prefix
+# of a large vocabulary stays cheap
+PREFIX_SCAN = 4096
+
+# Dropped from queries (but not from the index) unless the query has nothing else
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have i in is it its of on or "
+    "so that the this to was were will with you your".split()
+)
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.casefold())
+
+
+class SearchIndex(PostListener):
+    def __init__(self, k1=1.2, b=0.75, max_expansions=64):
+        self.k1 = k1
+        self.b = b
+        self.max_expansions = max_expansions
+        # term -> (doc numbers, tfs, max tf per block, min doc length per block)
+        self._postings = {}
+        self._vocabulary = []      # sorted terms, for prefix expansion
+        self._doc_ids = []         # doc number -> post id
+        self._doc_numbers = {}     # post id -> doc number
+        self._doc_lengths = array('I')
+        self._deleted = set()
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self._doc_numbers)
+
+    # Index maintenance
+    def post_added(self, post):
+        if post['id'] in self._doc_numbers:
+            return
+        doc = len(self._doc_ids)
+        self._doc_ids.append(post['id'])
+        self._doc_numbers[post['id']] = doc
+
+        counts = {}
+        for term in tokenize(post['title']):
+            counts[term] = counts.get(term, 0) + TITLE_WEIGHT
+        for term in tokenize(post['content']):
+            counts[term] = counts.get(term, 0) + 1
+        length = sum(counts.values())
+        for term, tf in counts.items():
+            tf = min(tf, 0xFFFF)
+            entry = self._postings.get(term)
+            if entry is None:
+                entry = self._postings[term] = (array('I'), array('H'), array('H'), array('I'))
+                insort(self._vocabulary, term)
+            docs, tfs, block_tfs, block_lengths = entry
+            if len(docs) % BLOCK_SIZE == 0:
+                block_tfs.append(tf)
+                block_lengths.append(length)
+            else:
+                if tf > block_tfs[-1]:
+                    block_tfs[-1] = tf
+                if length < block_lengths[-1]:
+                    block_lengths[-1] = length
+            docs.append(doc)
+            tfs.append(tf)
+        self._doc_lengths.append(length)
+        self._total_length += length
+
+    def post_removed(self, post):
+        doc = self._doc_numbers.pop(post['id'], None)
+        if doc is not None:
+            # Postings are compacted lazily; searches skip deleted docs
+            self._deleted.add(doc)
+            self._total_length -= self._doc_lengths[doc]
+
+    # Queries
+    def expand(self, token):
+        """Indexed terms starting with ``token``: the exact term first, then
+        the others by descending document frequency."""
+        postings = self._postings
+        vocabulary = self._vocabulary
+        start = bisect_left(vocabulary, token)
+        end = min(bisect_left(vocabulary, token + '\U0010ffff'), start + PREFIX_SCAN)
+        exact = [token] if token in postings else []
+        matches = vocabulary[start + len(exact):end]
+        frequencies = [len(postings[term][0]) for term in matches]
+        best = heapq.nlargest(self.max_expansions - len(exact), range(len(matches)),
+                              key=frequencies.__getitem__)
+        return exact + [matches[i] for i in best]
+
+    def search(self, query, limit=50):
+        """Post ids matching every token of ``query``, best BM25 score first."""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        tokens = [t for t in tokens if t not in STOPWORDS] or tokens
+        if not tokens or not self._doc_numbers or limit <= 0:
+            return []
+
+        groups = []
+        for token in tokens:
+            terms = self.expand(token)
+            if not terms:
+                return []
+            groups.append(terms)
+        # Start from the most selective token so later ones only probe candidates
+        groups.sort(key=lambda terms: sum(len(self._postings[t][0]) for t in terms))
+
+        # Postings of removed posts count towards a term's document frequency,
+        # so it can exceed n_docs: the idf is clamped to stay positive
+        n_docs = len(self._doc_numbers)
+        avg_length = self._total_length / n_docs
+        # BM25 length normalisation is k1 * (1 - b + b * length / avg_length)
+        base = self.k1 * (1 - self.b)
+        per_unit = self.k1 * self.b / avg_length
+        boost = self.k1 + 1
+        if len(groups) == 1:
+            return self._top_k(groups[0], limit, base, per_unit, boost)
+
+        lengths = self._doc_lengths
+        scores = None
+        for terms in groups:
+            group_scores = {}
+            for term in terms:
+                docs, tfs = self._postings[term][:2]
+                idf = math.log(1 + (max(n_docs - len(docs), 0) + 0.5) / (len(docs) + 0.5))
+                if scores is None or len(scores) * 8 > len(docs):
+                    pairs = zip(docs, tfs)
+                    if scores is not None:
+                        pairs = ((doc, tf) for doc, tf in pairs if doc in scores)
+                else:
+                    pairs = self._probe(docs, tfs, scores)
+                weight = idf * boost
+                get = group_scores.get
+                for doc, tf in pairs:
+                    # A token scores as its best term
+                    score = weight * tf / (tf + base + per_unit * lengths[doc])
+                    previous = get(doc)
+                    if previous is None or score > previous:
+                        group_scores[doc] = score
+            if scores is None:
+                scores = group_scores
+            else:
+                scores = {doc: score + group_scores[doc]
+                          for doc, score in scores.items() if doc in group_scores}
+            if not scores:
+                return []
+
+        return self._best(scores, limit)
+
+    def _best(self, scores, limit):
+        deleted = self._deleted
+        best = heapq.nlargest(limit, ((score, -doc) for doc, score in scores.items()
+                                      if doc not in deleted))
+        return [self._doc_ids[-neg_doc] for _, neg_doc in best]
+
+    def _top_k(self, terms, limit, base, per_unit, boost):
+        # A post scores as its best term, so the top ``limit`` posts are
+        # among the top ``limit`` of each term. Keys are ``(score, -doc)``,
+        # the order _best() ranks by, and ``floor`` is the smallest key of
+        # the ``limit`` best posts seen so far: nothing below it can rank.
+        n_docs = len(self._doc_numbers)
+        plans = []
+        for term in terms:
+            docs, tfs, block_tfs, block_lengths = self._postings[term]
+            idf = math.log(1 + (max(n_docs - len(docs), 0) + 0.5) / (len(docs) + 0.5))
+            plans.append((idf * boost, docs, tfs, block_tfs, block_lengths))
+        # Rarest terms first: they can score highest, so the floor rises
+        # early and rules out the rest
+        plans.sort(key=lambda plan: plan[0], reverse=True)
+
+        lengths = self._doc_lengths
+        deleted = self._deleted
+        best = {}               # doc -> key, for the top ``limit`` of each term
+        floor = (-math.inf, 0)
+        for weight, docs, tfs, block_tfs, block_lengths in plans:
+            if weight < floor[0]:
+                # No score reaches the term's weight
+                break
+            tf = max(block_tfs)
+            upper = weight * tf / (tf + base + per_unit * min(block_lengths))
+            if (upper, -docs[0]) < floor:
+                continue
+            bounds = [weight * tf / (tf + base + per_unit * length)
+                      for tf, length in zip(block_tfs, block_lengths)]
+            heap = []
+            # Equal bounds keep block order, so once a block's best possible
+            # key is below the floor, every block after it is too
+            for block in sorted(range(len(bounds)), key=bounds.__getitem__, reverse=True):
+                start = block * BLOCK_SIZE
+                if (bounds[block], -docs[start]) < floor:
+                    break
+                end = start + BLOCK_SIZE
+                part_tfs = tfs[start:end]
+                postings = zip(docs[start:end], part_tfs)
+                if floor[0] > 0:
+                    # Skip, without scoring them, postings whose frequency
+                    # could not reach the floor even in the block's shortest post
+                    shortest = base + per_unit * block_lengths[block]
+                    need = int(floor[0] * shortest / (weight - floor[0]) * (1 - 1e-9))
+                    postings = compress(postings, map(need.__le__, part_tfs))
+                for doc, tf in postings:
+                    score = weight * tf / (tf + base + per_unit * lengths[doc])
+                    if score < floor[0] or doc in deleted:
+                        continue
+                    key = (score, -doc)
+                    if len(heap) < limit:
+                        heapq.heappush(heap, key)
+                        if len(heap) < limit:
+                            continue
+                    elif key > heap[0]:
+                        heapq.heapreplace(heap, key)
+                    else:
+                        continue
+                    if heap[0] > floor:
+                        floor = heap[0]
+            for key in heap:
+                doc = -key[1]
+                if doc not in best or key > best[doc]:
+                    best[doc] = key
+            if len(best) >= limit:
+                floor = max(floor, heapq.nlargest(limit, best.values())[-1])
+        keys = heapq.nlargest(limit, best.values())
+        return [self._doc_ids[-neg_doc] for _, neg_doc in keys]
+
+    @staticmethod
+    def _probe(docs, tfs, candidates):
+        # Few candidates against a long posting list: binary search each one
+        for doc in candidates:
+            i = bisect_left(docs, doc)
+            if i < len(docs) and docs[i] == doc:
+                yield doc, tfs[i]
@@ -0,0 +1,77 @@
+"""Demo data used to populate an empty storage backend."""
+
+SEED_POSTS = [
+    {
+        'id': '0026975246745600000',  # forum.ids.lower_bound(timestamp)
+        'category_id': '2',  # Tech category
+        'title': '🚀 The Future of AI Development',
+        'content': 'Artificial Intelligence is evolving rapidly. Here are my thoughts on where it\'s heading and what developers should focus on...',
+        'author': 'tech_guru',
+        'timestamp': 1710498600000,  # 2024-03-15 10:30:00 UTC
+        'upvotes': 45,
+        'downvotes': 3,
+        'comments': [
+            {'author': 'ai_fan', 'content': 'Great insights! AI is definitely changing everything.'},
+            {'author': 'dev_123', 'content': 'Would love to hear more about ML applications.'}
+        ]
+    },
+    {
+        'id': '0026692131225600000',  # forum.ids.lower_bound(timestamp)
+        'category_id': '3',  # Humor category
+        'title': '😂 Programming Jokes Collection',
+        'content': 'Why do programmers prefer dark mode? Because light attracts bugs! Share your favorite programming jokes...',
+        'author': 'code_comedian',
+        'timestamp': 1710431100000,  # 2024-03-14 15:45:00 UTC
+        'upvotes': 72,
+        'downvotes': 5,
+        'comments': [
+            {'author': 'bug_hunter', 'content': 'That was actually funny! Here\'s another one...'},
+            {'author': 'java_lover', 'content': 'Classic! 😄'}
+        ]
+    },
+    {
+        'id': '0026231596646400000',  # forum.ids.lower_bound(timestamp)
+        'category_id': '1',  # General category
+        'title': '💡 Tips for Remote Work Success',
+        'content': 'After 3 years of remote work, here are my top tips for staying productive and maintaining work-life balance...',
+        'author': 'remote_pro',
+        'timestamp': 1710321300000,  # 2024-03-13 09:15:00 UTC
+        'upvotes': 38,
+        'downvotes': 2,
+        'comments': [
+            {'author': 'wfh_expert', 'content': 'Great tips! I would also add...'},
+            {'author': 'newbie_remote', 'content': 'This is exactly what I needed!'}
+        ]
+    }
+]
+
+SEED_CATEGORIES = [
+    {
+        'id': '1',
+        'name': '💬 General',
+        'description': 'Talk about anything and everything',
+        'icon': '💬',
+        'color': '#00C6FF'
+    },
+    {
+        'id': '2',
+        'name': '💻 Tech',
+        'description': 'Latest tech news and discussions',
+        'icon': '💻',
+        'color': '#8F00FF'
+    },
+    {
+        'id': '3',
+        'name': '😂 Humor',
+        'description': 'Funny stories and memes',
+        'icon': '😂',
+        'color': '#39FF14'
+    },
+    {
+        'id': '4',
+        'name': '🎓 Education',
+        'description': 'Learning and knowledge sharing',
+        'icon': '🎓',
+        'color': '#FF6B6B'
+    }
+]
@@ -0,0 +1,321 @@
+"""Process-wide forum data shared by every Streamlit session.
+
+``SharedForum`` holds the canonical posts and categories once per process
+(app.py builds it with ``st.cache_resource``). Sessions never mutate those
+records directly: each one gets a ``SessionView`` that reads through to the
+shared data and keeps only its own pending changes, which ``commit()``
+applies to the shared store and the storage backend. Votes are cast per
+user through a ``VoteLedger``, which keeps one vote per user per post, and
+go to the backend through a write-behind ``VoteQueue``.
+
+Per-user karma, thread and comment counts live in a ``UserStats``
+listener, so profiles are read in O(1). New comments are counted on the
+shared post and on their author at once, and reach the backend in batches
+through a ``CommentQueue``. Comment
+reads are cached per post version, so a new comment only invalidates the
+thread it was posted to.
+"""
+
+import threading
+
+from forum.cache import LRUCache
+from forum.categories import CategoryIndex
+from forum.comments import MAX_DEPTH, PER_PARENT, new_comment
+from forum.paging import COMMENT_PAGE_SIZE, PAGE_SIZE, Page, page_slice
+from forum.post_store import PostStore
+from forum.records import Category
+from forum.search import SearchIndex
+from forum.timestamps import TimeIndex
+from forum.trending import TrendingBoard
+from forum.users import UserStats
+from forum.votes import NONE, VoteLedger
+from forum.write_behind import CommentQueue, VoteQueue
+
+
+class SharedForum:
+    def __init__(self, backend, vote_flush_interval=1.0, comment_flush_interval=1.0):
+        self.backend = backend
+        # Votes and comments reach the shared store at once and the backend in batches
+        self.vote_queue = VoteQueue(backend, flush_interval=vote_flush_interval)
+        self.comment_queue = CommentQueue(backend, flush_interval=comment_flush_interval)
+        self.comment_cache = LRUCache()
+        self.posts = PostStore()
+        self.search_index = SearchIndex()
+        self.trending_board = TrendingBoard()
+        self.category_index = CategoryIndex()
+        self.user_stats = UserStats()
+        self.time_index = TimeIndex()
+        self.posts.subscribe(self.search_index)
+        self.posts.subscribe(self.trending_board)
+        self.posts.subscribe(self.category_index)
+        self.posts.subscribe(self.user_stats)
+        self.posts.subscribe(self.time_index)
+        self.posts.extend(backend.load_posts())
+        self.ledger = VoteLedger()
+        self.posts.subscribe(self.ledger)
+        for post_id, user_id, direction in backend.load_ballots():
+            self.ledger.cast(post_id, user_id, direction)
+        self.user_stats.load_comment_counts(backend.comment_counts_by_post())
+        self.categories = tuple(map(Category.of, backend.load_categories()))
+        self.categories_by_id = {category['id']: category for category in self.categories}
+        self._lock = threading.Lock()
+
+    def _resolve(self, ids):
+        return [post for post in map(self.posts.get, ids) if post is not None]
+
+    # Paged feeds: only the posts on the requested page are materialised
+    def trending_page(self, cursor=None, limit=PAGE_SIZE, mode='top'):
+        with self._lock:
+            page = self.trending_board.page(cursor, limit, mode)
+        return page._replace(items=self._resolve(page.items))
+
+    def search_page(self, query, cursor=None, limit=PAGE_SIZE):
+        with self._lock:
+            # One extra hit tells page_slice whether another page follows
+            ids = self.search_index.search(query, (cursor or 0) + limit + 1)
+        page = page_slice(ids, cursor, limit)
+        return page._replace(items=self._resolve(page.items))
+
+    def category_page(self, category_id, cursor=None, limit=PAGE_SIZE, sort='new'):
+        with self._lock:
+            page = self.category_index.page(category_id, cursor, limit, sort)
+        return page._replace(items=self._resolve(page.items))
+
+    def category_stats(self, category_id):
+        with self._lock:
+            return self.category_index.stats(category_id)
+
+    def time_page(self, start_ms=None, end_ms=None, cursor=None, limit=PAGE_SIZE):
+        """Posts created in ``[start_ms, end_ms)`` (epoch ms), newest first."""
+        with self._lock:
+            page = self.time_index.page(start_ms, end_ms, cursor, limit)
+        return page._replace(items=self._resolve(page.items))
+
+    # Comments stay in the backend until a thread is actually opened. Cached
+    # results are shared by every session and must not be mutated.
+    def _cached_comments(self, key, read):
+        post_id = key[1]
+        version = self.posts.version(post_id)
+
+        def load():
+            # Comments still queued for this thread have to be stored first
+            if self.comment_queue.pending(post_id):
+                self.comment_queue.flush()
+            return read()
+        return self.comment_cache.get_or_create((*key, version), load)
+
+    def comments_page(self, post_id, cursor=None, limit=COMMENT_PAGE_SIZE):
+        return self._cached_comments(
+            ('page', post_id, cursor, limit),
+            lambda: self.backend.comments_page(post_id, cursor, limit))
+
+    def comment_tree(self, post_id, root_id=None, max_depth=MAX_DEPTH, per_parent=PER_PARENT):
+        return self._cached_comments(
+            ('tree', post_id, root_id, max_depth, per_parent),
+            lambda: self.backend.comment_tree(post_id, root_id, max_depth, per_parent))
+
+    def get_comment(self, comment_id, post_id):
+        if self.comment_queue.pending(post_id):
+            self.comment_queue.flush()
+        comment = self.backend.get_comment(comment_id)
+        return comment if comment is not None and comment['post_id'] == post_id else None
+
+    def add_comment(self, post_id, author, content, parent_id=None):
+        """Comment on ``post_id``, or reply to ``parent_id``; returns the new comment.
+
+        The post's comment count, the author's stats and the post's version
+        change together; the comment is stored by the next flush.
+        """
+        parent = None
+        if parent_id is not None:
+            parent = self.get_comment(parent_id, post_id)
+            if parent is None:
+                raise KeyError(f"unknown comment: {parent_id}")
+        comment = new_comment(post_id, author, content, parent)
+        with self._lock:
+            if post_id not in self.posts:
+                raise KeyError(f"unknown post: {post_id}")
+            # Queued before the version changes, so a reader that sees the
+            # new version also sees the comment as pending
+            self.comment_queue.comment(post_id, comment)
+            self.posts.add_comment(post_id, comment)
+        return comment
+
+    def profile(self, username):
+        return self.user_stats.profile(username)
+
+    def check_user_stats(self, repair=False):
+        """Compare the incremental user stats with a rebuild from the stored
+        data; returns ``{username: (incremental, rebuilt)}`` for every
+        mismatch, and adopts the rebuilt stats if ``repair`` is set."""
+        with self._lock:
+            # Every comment counted so far has to be in the backend
+            self.comment_queue.flush()
+            rebuilt = UserStats.rebuild(self.posts, self.backend.comment_counts_by_post())
+            mismatches = self.user_stats.diff(rebuilt)
+            if mismatches and repair:
+                self.user_stats.adopt(rebuilt)
+        return mismatches
+
+    def add_posts(self, posts):
+        with self._lock:
+            self.posts.extend(posts)
+            self.backend.save_posts(posts)
+
+    def cast_votes(self, ballots):
+        """Apply ``{(post_id, user_id): direction}``; repeated votes are no-ops."""
+        with self._lock:
+            for (post_id, user_id), direction in ballots.items():
+                if post_id not in self.posts:
+                    continue
+                up, down = self.ledger.cast(post_id, user_id, direction)
+                if up or down:
+                    self.posts.vote(post_id, up=up, down=down)
+                    self.vote_queue.vote(post_id, up, down, user_id, direction)
+
+
+class SessionView:
+    """PostStore-compatible view of a SharedForum plus a session overlay."""
+
+    def __init__(self, shared):
+        self.shared = shared
+        self._new_posts = {}
+        self._ballots = {}   # (post_id, user_id) -> direction
+        self._votes = {}     # post_id -> (up, down) those ballots add
+
+    @property
+    def categories(self):
+        return self.shared.categories
+
+    def category(self, category_id):
+        return self.shared.categories_by_id.get(category_id)
+
+    def category_stats(self, category_id):
+        # Pending changes are committed at the end of every action
+        return self.shared.category_stats(category_id)
+
+    def _merged(self, post):
+        delta = self._votes.get(post['id'])
+        if delta is None:
+            return post
+        merged = post.copy()
+        merged['upvotes'] += delta[0]
+        merged['downvotes'] += delta[1]
+        return merged
+
+    # Reads
+    def __len__(self):
+        return len(self.shared.posts) + len(self._new_posts)
+
+    def __iter__(self):
+        for post in self.shared.posts:
+            yield self._merged(post)
+        yield from map(self._merged, self._new_posts.values())
+
+    def __contains__(self, post_id):
+        return post_id in self._new_posts or post_id in self.shared.posts
+
+    def __getitem__(self, post_id):
+        post = self.get(post_id)
+        if post is None:
+            raise KeyError(post_id)
+        return post
+
+    def get(self, post_id, default=None):
+        post = self._new_posts.get(post_id) or self.shared.posts.get(post_id)
+        return self._merged(post) if post is not None else default
+
+    def _with_pending(self, page, cursor, pending):
+        items = list(page.items)
+        # Uncommitted posts show up on the first page only
+        if cursor is None:
+            items.extend(pending)
+        return page._replace(items=[self._merged(post) for post in items])
+
+    def trending_page(self, cursor=None, limit=PAGE_SIZE, mode='top'):
+        return self._with_pending(self.shared.trending_page(cursor, limit, mode),
+                                  cursor, self._new_posts.values())
+
+    def search_page(self, query, cursor=None, limit=PAGE_SIZE):
+        needle = query.lower()
+        pending = [post for post in self._new_posts.values()
+                   if needle in post['title'].lower() or needle in post['content'].lower()]
+        return self._with_pending(self.shared.search_page(query, cursor, limit), cursor, pending)
+
+    def category_page(self, category_id, cursor=None, limit=PAGE_SIZE, sort='new'):
+        pending = [post for post in self._new_posts.values() if post['category_id'] == category_id]
+        return self._with_pending(self.shared.category_page(category_id, cursor, limit, sort),
+                                  cursor, pending)
+
+    def time_page(self, start_ms=None, end_ms=None, cursor=None, limit=PAGE_SIZE):
+        pending = [post for post in self._new_posts.values()
+                   if (start_ms is None or post['timestamp'] >= start_ms)
+                   and (end_ms is None or post['timestamp'] < end_ms)]
+        return self._with_pending(self.shared.time_page(start_ms, end_ms, cursor, limit),
+                                  cursor, pending)
+
+    def version(self, post_id):
+        """Changes whenever anything this session shows of ``post_id`` does."""
+        return self.shared.posts.version(post_id), self._votes.get(post_id)
+
+    def profile(self, username):
+        # Pending posts and votes are committed at the end of every action
+        return self.shared.profile(username)
+
+    def comments_page(self, post_id, cursor=None, limit=COMMENT_PAGE_SIZE):
+        if post_id in self._new_posts:
+            return Page([], None)
+        return self.shared.comments_page(post_id, cursor, limit)
+
+    def comment_tree(self, post_id, root_id=None, max_depth=MAX_DEPTH, per_parent=PER_PARENT):
+        if post_id in self._new_posts:
+            return []
+        return self.shared.comment_tree(post_id, root_id, max_depth, per_parent)
+
+    # Pending writes
+    def add_comment(self, post_id, author, content, parent_id=None):
+        # Comments are written straight through, so a new post goes first
+        if post_id in self._new_posts:
+            self.commit()
+        return self.shared.add_comment(post_id, author, content, parent_id)
+
+    def append(self, post):
+        if post['id'] in self:
+            raise ValueError(f"duplicate post id: {post['id']}")
+        self._new_posts[post['id']] = post
+
+    def user_vote(self, post_id, user_id):
+        """``user_id``'s current vote on ``post_id``: UP, DOWN or NONE."""
+        direction = self._ballots.get((post_id, user_id))
+        if direction is not None:
+            return direction
+        return self.shared.ledger.vote_of(post_id, user_id)
+
+    def cast_vote(self, post_id, user_id, direction):
+        """Vote UP, DOWN or NONE (retract); returns False if nothing changed."""
+        if post_id not in self:
+            return False
+        previous = self.user_vote(post_id, user_id)
+        if previous == direction:
+            return False
+        pending = self._votes.get(post_id, (0, 0))
+        self._votes[post_id] = (pending[0] + (direction > 0) - (previous > 0),
+                                pending[1] + (direction < 0) - (previous < 0))
+        self._ballots[(post_id, user_id)] = direction
+        return True
+
+    def toggle_vote(self, post_id, user_id, direction):
+        """Cast ``direction``, or retract it if that is already the user's vote."""
+        if self.user_vote(post_id, user_id) == direction:
+            direction = NONE
+        return self.cast_vote(post_id, user_id, direction)
+
+    def commit(self):
+        new_posts, self._new_posts = list(self._new_posts.values()), {}
+        ballots, self._ballots, self._votes = self._ballots, {}, {}
+        if new_posts:
+            self.shared.add_posts(new_posts)
+        if ballots:
+            # The ledger recomputes each delta, so votes cast meanwhile by
+            # the same user in another session are never counted twice
+            self.shared.cast_votes(ballots)
@@ -0,0 +1,76 @@
+"""Static page assets, sent to the browser once per session.
+
+Streamlit re-sends every element on every rerun, so app.py's stylesheet and
+its HTML widgets (particles background, theme switcher, thread modal, ...)
+used to cost tens of KB per interaction. ``StaticBundle`` loads them from
+the ``static/`` directory and builds a single small injector component.
+Its script copies the stylesheet into the parent page's ``<head>`` and
+mounts each widget as the same zero-height iframe ``components.html``
+would have created, but directly in the parent document, where it survives
+reruns. app.py only emits the injector when the session has not received
+the bundle's current digest yet.
+
+Stylesheets are merged, deduplicated and minified by ``forum.css_bundle``
+first, and so are the ``<style>`` blocks inside each widget.
+"""
+
+import hashlib
+import json
+import os
+
+from forum.css_bundle import bundle_css, minify_style_blocks
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+
+INJECTOR = """<script>
+(function () {
+    const bundle = %(bundle)s;
+    const doc = window.parent.document;
+    if (doc.getElementById(bundle.id)) {
+        return;
+    }
+    // Drop assets from an older version of the bundle
+    doc.querySelectorAll("[data-forum-assets]").forEach(function (el) { el.remove(); });
+
+    const style = doc.createElement("style");
+    style.id = bundle.id;
+    style.setAttribute("data-forum-assets", "");
+    style.textContent = bundle.css;
+    doc.head.appendChild(style);
+
+    bundle.frames.forEach(function (html) {
+        const frame = doc.createElement("iframe");
+        frame.setAttribute("data-forum-assets", "");
+        frame.setAttribute("sandbox", "allow-scripts allow-same-origin allow-forms allow-popups");
+        frame.style.cssText = "border: none; width: 100%%; height: 0; position: absolute;";
+        frame.srcdoc = html;
+        doc.body.appendChild(frame);
+    });
+})();
+</script>"""
+
+
+def read_static(name):
+    with open(os.path.join(STATIC_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+class StaticBundle:
+    def __init__(self, css_files=(), frame_files=()):
+        self.css = bundle_css([read_static(name) for name in css_files])
+        self.frames = [minify_style_blocks(read_static(name)) for name in frame_files]
+        digest = hashlib.sha256()
+        for part in [self.css, *self.frames]:
+            digest.update(part.encode())
+            digest.update(b"\0")
+        self.digest = digest.hexdigest()[:12]
+
+    def injector_html(self):
+        bundle = {'id': f"forum-assets-{self.digest}", 'css': self.css, 'frames': self.frames}
+        # "</" would end the <script> block early, whatever string it is in
+        payload = json.dumps(bundle).replace("</", "<\\/")
+        return INJECTOR % {'bundle': payload}
+
+    @property
+    def size(self):
+        return len(self.injector_html().encode())
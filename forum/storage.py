@@ -0,0 +1,676 @@
+"""Pluggable storage backends for posts, comments and categories.
+
+Backends speak the same dict shapes app.py uses: a post is a dict with
+``id``, ``category_id``, ``title``, ``content``, ``author``, ``timestamp``,
+``upvotes``, ``downvotes`` and ``comment_count``, and a category is a dict
+with ``id``, ``name``, ``description``, ``icon`` and ``color``. The
+``timestamp`` is epoch milliseconds (``forum.timestamps``); posts saved
+with the old display strings are converted on the way in. Posts and
+comments also carry the escaped ``*_html`` fields from ``forum.sanitize``;
+backends add them to records that arrive without them. Backends accept
+plain dicts and hand back the compact records of ``forum.records``, which
+support the same dict-style access.
+
+Comments are stored apart from the post records, as the nested records
+described in ``forum.comments``. ``comments_page()`` reads a page of a
+post's top-level comments and ``comment_tree()`` a depth-limited subtree
+of replies, so loading the feed never loads a single comment. New comments
+are ``{'author', 'content'}`` dicts, optionally with ``id``, ``parent_id``
+and ``score``. ``save_posts()`` still accepts posts carrying a
+``comments`` list, as the seed data does, and stores them.
+
+``open_backend()`` picks the backend from a location string: ``None``,
+``""`` or ``":memory:"`` give a ``MemoryBackend``, anything else is a path
+to a SQLite database file.
+"""
+
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+
+from forum.comments import MAX_DEPTH, PER_PARENT, CommentTree
+from forum.ids import new_id
+from forum.paging import COMMENT_PAGE_SIZE, Page, chunked
+from forum.post_store import PostStore
+from forum.records import Comment, Post
+from forum.sanitize import COMMENT_HTML_FIELDS, ESCAPES, POST_HTML_FIELDS, sanitize_comment, sanitize_post
+from forum.seed import SEED_CATEGORIES, SEED_POSTS
+from forum.timestamps import to_ms
+
+CHUNK_SIZE = 5000
+
+POST_FIELDS = ('id', 'category_id', 'title', 'content', 'author',
+               'timestamp', 'upvotes', 'downvotes', 'comment_count',
+               'title_html', 'preview_html', 'author_html')
+
+
+def copy_post(post):
+    copy = dict(post)
+    copy['comments'] = [dict(comment) for comment in post.get('comments', ())]
+    return copy
+
+
+def split_comments(post):
+    """The post record without its comments, and the comments (None if absent)."""
+    record = sanitize_post(dict(post))
+    record['timestamp'] = to_ms(record['timestamp'])
+    comments = record.pop('comments', None)
+    if comments is None:
+        record.setdefault('comment_count', 0)
+        return record, None
+    record['comment_count'] = len(comments)
+    return record, [dict(comment) for comment in comments]
+
+
+class StorageBackend(ABC):
+    @abstractmethod
+    def load_posts(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def save_posts(self, posts):
+        raise NotImplementedError
+
+    @abstractmethod
+    def apply_votes(self, deltas, ballots=None):
+        """Apply ``{post_id: (up, down)}`` vote deltas in one batch.
+
+        ``ballots`` optionally records who voted, as ``{(post_id, user_id):
+        direction}``; a direction of 0 removes the user's vote.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def load_ballots(self):
+        """Every recorded vote as ``(post_id, user_id, direction)``."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def add_comments(self, comments):
+        """Append ``(post_id, comment)`` pairs in one batch."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def comments_page(self, post_id, cursor=None, limit=COMMENT_PAGE_SIZE):
+        """A ``Page`` of ``post_id``'s top-level comments, oldest first."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def comment_tree(self, post_id, root_id=None, max_depth=MAX_DEPTH, per_parent=PER_PARENT):
+        """The best ``per_parent`` replies per comment, ``max_depth`` levels
+        below ``root_id`` (or below the post), in display order."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_comment(self, comment_id):
+        raise NotImplementedError
+
+    @abstractmethod
+    def comment_counts_by_post(self):
+        """``{post_id: {author: number of comments}}``."""
+        raise NotImplementedError
+
+    # Bulk export: lists of at most chunk_size records, never a whole table
+    @abstractmethod
+    def iter_posts(self, chunk_size=CHUNK_SIZE):
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_comments(self, chunk_size=CHUNK_SIZE):
+        """Comments ordered so that every parent comes before its replies."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_ballots(self, chunk_size=CHUNK_SIZE):
+        """``(post_id, user_id, direction)`` tuples."""
+        raise NotImplementedError
+
+    # Bulk import: records already stored are kept as they are
+    @abstractmethod
+    def import_posts(self, posts):
+        """Store the posts whose id is new, with no comments yet."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def import_comments(self, comments):
+        """Like ``add_comments()``, skipping comments whose id is stored."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def import_ballots(self, ballots):
+        """Record ``(post_id, user_id, direction)`` ballots that are not stored
+        yet; the posts' vote counts are left alone."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def load_categories(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def save_categories(self, categories):
+        raise NotImplementedError
+
+    @abstractmethod
+    def is_empty(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MemoryBackend(StorageBackend):
+    def __init__(self):
+        self._posts = PostStore()
+        self._comments = CommentTree()
+        self._categories = []
+        self._ballots = {}
+        self._lock = threading.Lock()
+
+    # Callers get copies so they can't mutate the stored records behind our back
+    def load_posts(self):
+        return [post.copy() for post in self._posts]
+
+    def save_posts(self, posts):
+        with self._lock:
+            for post in posts:
+                record, comments = split_comments(post)
+                if comments is not None:
+                    self._comments.remove_post(record['id'])
+                    for comment in comments:
+                        self._comments.add(record['id'], comment)
+                self._posts.remove(record['id'])
+                self._posts.append(record)
+
+    def apply_votes(self, deltas, ballots=None):
+        with self._lock:
+            for post_id, (up, down) in deltas.items():
+                self._posts.vote(post_id, up=up, down=down)
+            for key, direction in (ballots or {}).items():
+                if direction:
+                    self._ballots[key] = direction
+                else:
+                    self._ballots.pop(key, None)
+
+    def load_ballots(self):
+        return [(post_id, user_id, direction)
+                for (post_id, user_id), direction in list(self._ballots.items())]
+
+    def iter_posts(self, chunk_size=CHUNK_SIZE):
+        return chunked((dict(post) for post in self._posts), chunk_size)
+
+    def iter_comments(self, chunk_size=CHUNK_SIZE):
+        return chunked(self._comments.records(), chunk_size)
+
+    def iter_ballots(self, chunk_size=CHUNK_SIZE):
+        return chunked(self.load_ballots(), chunk_size)
+
+    def add_comments(self, comments):
+        with self._lock:
+            for post_id, comment in comments:
+                post = self._posts.get(post_id)
+                if post is not None:
+                    self._comments.add(post_id, comment)
+                    post['comment_count'] += 1
+
+    def import_posts(self, posts):
+        with self._lock:
+            for post in posts:
+                if post['id'] not in self._posts:
+                    record, _ = split_comments(dict(post, comment_count=0))
+                    self._posts.append(record)
+
+    def import_comments(self, comments):
+        self.add_comments((post_id, comment) for post_id, comment in comments
+                          if self._comments.get(comment.get('id')) is None)
+
+    def import_ballots(self, ballots):
+        with self._lock:
+            for post_id, user_id, direction in ballots:
+                if direction:
+                    self._ballots.setdefault((post_id, user_id), direction)
+
+    def comments_page(self, post_id, cursor=None, limit=COMMENT_PAGE_SIZE):
+        return self._comments.roots_page(post_id, cursor, limit)
+
+    def comment_tree(self, post_id, root_id=None, max_depth=MAX_DEPTH, per_parent=PER_PARENT):
+        return self._comments.subtree(post_id, root_id, max_depth, per_parent)
+
+    def get_comment(self, comment_id):
+        return self._comments.get(comment_id)
+
+    def comment_counts_by_post(self):
+        return self._comments.counts_by_post()
+
+    def load_categories(self):
+        return [dict(category) for category in self._categories]
+
+    def save_categories(self, categories):
+        with self._lock:
+            self._categories = [dict(category) for category in categories]
+
+    def is_empty(self):
+        return not len(self._posts) and not self._categories
+
+
+# Also used to rebuild the table in place, under another name
+POSTS_TABLE = """
+CREATE TABLE IF NOT EXISTS {table} (
+    id          TEXT PRIMARY KEY,
+    category_id TEXT NOT NULL,
+    title       TEXT NOT NULL,
+    content     TEXT NOT NULL,
+    author      TEXT NOT NULL,
+    timestamp   INTEGER NOT NULL,
+    upvotes     INTEGER NOT NULL DEFAULT 0,
+    downvotes   INTEGER NOT NULL DEFAULT 0,
+    comment_count INTEGER NOT NULL DEFAULT 0,
+    title_html  TEXT NOT NULL DEFAULT '',
+    preview_html TEXT NOT NULL DEFAULT '',
+    author_html TEXT NOT NULL DEFAULT '',
+    score       INTEGER GENERATED ALWAYS AS (upvotes - downvotes) VIRTUAL
+);
+"""
+
+SCHEMA = POSTS_TABLE.format(table='posts') + """
+CREATE INDEX IF NOT EXISTS posts_category ON posts (category_id, timestamp);
+CREATE INDEX IF NOT EXISTS posts_timestamp ON posts (timestamp);
+CREATE INDEX IF NOT EXISTS posts_score ON posts (score DESC);
+
+CREATE TABLE IF NOT EXISTS comments (
+    id          TEXT PRIMARY KEY,
+    post_id     TEXT NOT NULL REFERENCES posts (id) ON DELETE CASCADE,
+    parent_id   TEXT REFERENCES comments (id) ON DELETE CASCADE,
+    path        TEXT NOT NULL,
+    depth       INTEGER NOT NULL,
+    author      TEXT NOT NULL,
+    content     TEXT NOT NULL,
+    content_html TEXT NOT NULL DEFAULT '',
+    author_html TEXT NOT NULL DEFAULT '',
+    score       INTEGER NOT NULL DEFAULT 0,
+    reply_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS comments_thread ON comments (post_id, depth, id);
+CREATE INDEX IF NOT EXISTS comments_path ON comments (post_id, path);
+
+CREATE TABLE IF NOT EXISTS ballots (
+    post_id   TEXT NOT NULL REFERENCES posts (id) ON DELETE CASCADE,
+    user_id   TEXT NOT NULL,
+    direction INTEGER NOT NULL,
+    PRIMARY KEY (post_id, user_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS categories (
+    id          TEXT PRIMARY KEY,
+    position    INTEGER NOT NULL,
+    name        TEXT NOT NULL,
+    description TEXT NOT NULL,
+    icon        TEXT NOT NULL,
+    color       TEXT NOT NULL
+);
+"""
+
+# Statements are kept as constants so sqlite3's per-connection statement
+# cache reuses the prepared form instead of recompiling them on each call.
+SELECT_POSTS = f"SELECT {', '.join(POST_FIELDS)} FROM posts"
+COMMENT_COLUMNS = ("id, post_id, parent_id, path, depth, author, content, content_html,"
+                   " author_html, score, reply_count")
+# Keyset paging on the comment id: the cursor is the last id already shown
+SELECT_COMMENT_PAGE = f"""
+SELECT {COMMENT_COLUMNS} FROM comments
+WHERE post_id = ? AND depth = 0 AND id > ? ORDER BY id LIMIT ?
+"""
+# Ranks siblings by score with a window function, then walks down from the
+# first level keeping only the top :per_parent of each sibling group, so
+# replies under a dropped comment are never returned. sort_key chains the
+# sibling ranks, giving depth-first, best-first display order. Paths hold
+# only digits and '/', so ['', '~') covers every comment of the post.
+SELECT_COMMENT_TREE = f"""
+WITH RECURSIVE
+bounds AS (
+    SELECT COALESCE(root.path, '') AS low,
+           COALESCE(root.path || '0', '~') AS high,
+           COALESCE(root.depth + 1, 0) AS first_depth
+    FROM (SELECT 1) LEFT JOIN comments AS root ON root.id = :root_id
+),
+ranked AS (
+    SELECT {COMMENT_COLUMNS},
+           ROW_NUMBER() OVER (PARTITION BY parent_id ORDER BY score DESC, id) AS sibling_rank
+    FROM comments, bounds
+    WHERE post_id = :post_id AND path >= low AND path < high
+      AND depth >= first_depth AND depth < first_depth + :max_depth
+),
+tree AS (
+    SELECT ranked.*, printf('%06d', sibling_rank) AS sort_key
+    FROM ranked, bounds
+    WHERE depth = first_depth AND sibling_rank <= :per_parent
+    UNION ALL
+    SELECT ranked.*, tree.sort_key || printf('%06d', ranked.sibling_rank)
+    FROM ranked JOIN tree ON ranked.parent_id = tree.id
+    WHERE ranked.sibling_rank <= :per_parent
+)
+SELECT {COMMENT_COLUMNS} FROM tree ORDER BY sort_key
+"""
+INSERT_POST = """
+INSERT INTO posts (id, category_id, title, content, author, timestamp, upvotes, downvotes,
+                   comment_count, title_html, preview_html, author_html)
+VALUES (:id, :category_id, :title, :content, :author, :timestamp, :upvotes, :downvotes,
+        :comment_count, :title_html, :preview_html, :author_html)
+"""
+IMPORT_POST = INSERT_POST + "ON CONFLICT (id) DO NOTHING"
+UPSERT_POST = INSERT_POST + """ON CONFLICT (id) DO UPDATE SET
+    category_id = excluded.category_id, title = excluded.title,
+    content = excluded.content, author = excluded.author,
+    timestamp = excluded.timestamp, upvotes = excluded.upvotes,
+    downvotes = excluded.downvotes, comment_count = excluded.comment_count,
+    title_html = excluded.title_html, preview_html = excluded.preview_html,
+    author_html = excluded.author_html
+"""
+DELETE_POST_COMMENTS = "DELETE FROM comments WHERE post_id = ?"
+# The path and depth come from the parent row, which may have been inserted
+# earlier in the same executemany batch
+INSERT_COMMENT = """
+INSERT INTO comments (id, post_id, parent_id, path, depth, author, content, content_html,
+                      author_html, score)
+VALUES (:id, :post_id, :parent_id,
+        COALESCE((SELECT path || '/' FROM comments WHERE id = :parent_id), '') || :id,
+        COALESCE((SELECT depth + 1 FROM comments WHERE id = :parent_id), 0),
+        :author, :content, :content_html, :author_html, :score)
+"""
+IMPORT_COMMENT = INSERT_COMMENT + "ON CONFLICT (id) DO NOTHING"
+COUNT_REPLY = "UPDATE comments SET reply_count = reply_count + 1 WHERE id = ?"
+COUNT_COMMENT = "UPDATE posts SET comment_count = comment_count + 1 WHERE id = ?"
+# Imports skip stored rows, so the counters they touch are counted again;
+# a comment's replies are the next level of its path range
+RECOUNT_REPLIES = """
+UPDATE comments SET reply_count = (
+    SELECT COUNT(*) FROM comments AS reply
+    WHERE reply.post_id = comments.post_id AND reply.depth = comments.depth + 1
+      AND reply.path > comments.path || '/' AND reply.path < comments.path || '0'
+) WHERE id = ?
+"""
+RECOUNT_COMMENTS = """
+UPDATE posts SET comment_count = (SELECT COUNT(*) FROM comments WHERE post_id = posts.id)
+WHERE id = ?
+"""
+SELECT_COMMENT = f"SELECT {COMMENT_COLUMNS} FROM comments WHERE id = ?"
+COUNT_COMMENTS_BY_POST = "SELECT post_id, author, COUNT(*) FROM comments GROUP BY post_id, author"
+# Keyset scans for bulk export, one chunk per statement
+SELECT_POSTS_AFTER = SELECT_POSTS + " WHERE id > ? ORDER BY id LIMIT ?"
+SELECT_COMMENTS_AFTER = f"""
+SELECT {COMMENT_COLUMNS} FROM comments WHERE (post_id, path) > (?, ?) ORDER BY post_id, path LIMIT ?
+"""
+SELECT_BALLOTS_AFTER = """
+SELECT post_id, user_id, direction FROM ballots
+WHERE (post_id, user_id) > (?, ?) ORDER BY post_id, user_id LIMIT ?
+"""
+UPDATE_VOTES = "UPDATE posts SET upvotes = upvotes + ?, downvotes = downvotes + ? WHERE id = ?"
+UPSERT_BALLOT = """
+INSERT INTO ballots (post_id, user_id, direction) VALUES (?, ?, ?)
+ON CONFLICT (post_id, user_id) DO UPDATE SET direction = excluded.direction
+"""
+IMPORT_BALLOT = """
+INSERT INTO ballots (post_id, user_id, direction) VALUES (?, ?, ?)
+ON CONFLICT (post_id, user_id) DO NOTHING
+"""
+DELETE_BALLOT = "DELETE FROM ballots WHERE post_id = ? AND user_id = ?"
+SELECT_BALLOTS = "SELECT post_id, user_id, direction FROM ballots"
+DELETE_CATEGORIES = "DELETE FROM categories"
+INSERT_CATEGORY = """
+INSERT INTO categories (id, position, name, description, icon, color)
+VALUES (:id, :position, :name, :description, :icon, :color)
+"""
+SELECT_CATEGORIES = "SELECT id, name, description, icon, color FROM categories ORDER BY position"
+
+
+def comment_row(post_id, comment):
+    comment = sanitize_comment(dict(comment))
+    return {'id': comment.get('id') or new_id(), 'post_id': post_id,
+            'parent_id': comment.get('parent_id'), 'author': comment['author'],
+            'content': comment['content'], 'content_html': comment['content_html'],
+            'author_html': comment['author_html'], 'score': comment.get('score', 0)}
+
+
+def sql_escape(column, limit=None):
+    """SQL expression equivalent to ``forum.sanitize.escape`` (for migrations)."""
+    expr = f"substr({column}, 1, {limit})" if limit else column
+    for char, entity in ESCAPES:
+        expr = f"replace({expr}, char({ord(char)}), '{entity}')"
+    return expr
+
+
+class SQLiteBackend(StorageBackend):
+    def __init__(self, path):
+        self.path = path
+        # One connection shared by every Streamlit session thread; the lock
+        # serializes access, and WAL lets other processes read meanwhile.
+        self._conn = sqlite3.connect(path, check_same_thread=False,
+                                     isolation_level=None, cached_statements=256)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+            self._conn.execute("PRAGMA foreign_keys = ON")
+            self._migrate()
+            self._conn.executescript(SCHEMA)
+
+    def _columns(self, table):
+        return {row['name'] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+
+    def _migrate(self):
+        comment_columns = self._columns('comments')
+        if comment_columns and 'path' not in comment_columns:
+            # Flat comments with integer ids become top-level tree nodes;
+            # zero-padding keeps them sorted before every snowflake id
+            self._conn.executescript("""
+                BEGIN;
+                ALTER TABLE comments RENAME TO comments_flat;
+                DROP INDEX IF EXISTS comments_post;
+            """ + SCHEMA + """
+                INSERT INTO comments (id, post_id, path, depth, author, content, content_html,
+                                      author_html)
+                SELECT printf('%019d', id), post_id, printf('%019d', id), 0, author, content,
+                       '', ''
+                FROM comments_flat;
+                DROP TABLE comments_flat;
+                COMMIT;
+            """)
+        post_columns = self._columns('posts')
+        if post_columns and 'comment_count' not in post_columns:
+            # Databases created before comment counts were cached
+            self._conn.executescript("""
+                BEGIN;
+                ALTER TABLE posts ADD COLUMN comment_count INTEGER NOT NULL DEFAULT 0;
+                UPDATE posts SET comment_count =
+                    (SELECT COUNT(*) FROM comments WHERE comments.post_id = posts.id);
+                COMMIT;
+            """)
+        for table, fields in (('posts', POST_HTML_FIELDS), ('comments', COMMENT_HTML_FIELDS)):
+            columns = self._columns(table)
+            if not columns:
+                continue
+            statements = [f"ALTER TABLE {table} ADD COLUMN {html_field} TEXT NOT NULL DEFAULT ''"
+                          for html_field, _ in fields.values() if html_field not in columns]
+            if statements or table == 'comments' and 'path' not in comment_columns:
+                # Records stored before escaping happened at write time;
+                # escaping '' gives '', so already filled rows are unaffected
+                assignments = ', '.join(f"{html_field} = {sql_escape(field, limit)}"
+                                        for field, (html_field, limit) in fields.items())
+                self._conn.executescript(
+                    "BEGIN;" + "".join(f"{sql};" for sql in statements)
+                    + f"UPDATE {table} SET {assignments} WHERE author_html = '';COMMIT;")
+        timestamp_type = self._conn.execute(
+            "SELECT type FROM pragma_table_info('posts') WHERE name = 'timestamp'").fetchone()
+        if timestamp_type is not None and timestamp_type['type'].upper() == 'TEXT':
+            # Display strings become epoch ms. A TEXT column would store the
+            # integers as text again, so the table is rebuilt with an INTEGER
+            # column; foreign keys are off meanwhile so dropping the old
+            # table doesn't cascade to the comments.
+            self._conn.create_function('to_ms', 1, to_ms, deterministic=True)
+            columns = ', '.join(POST_FIELDS)
+            values = columns.replace('timestamp', 'to_ms(timestamp)')
+            self._conn.execute("PRAGMA foreign_keys = OFF")
+            self._conn.executescript(
+                "BEGIN;" + POSTS_TABLE.format(table='posts_ms') + f"""
+                INSERT INTO posts_ms ({columns}) SELECT {values} FROM posts;
+                DROP TABLE posts;
+                ALTER TABLE posts_ms RENAME TO posts;
+                COMMIT;
+            """)
+            self._conn.execute("PRAGMA foreign_keys = ON")
+
+    def _transaction(self, statements):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for sql, rows in statements:
+                    self._conn.executemany(sql, rows)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def load_posts(self):
+        with self._lock:
+            rows = self._conn.execute(SELECT_POSTS).fetchall()
+        return [Post.of(row) for row in rows]
+
+    def save_posts(self, posts):
+        split = [split_comments(post) for post in posts]
+        # Comments are only replaced for posts that carry a comments list
+        with_comments = [(record['id'], comments) for record, comments in split
+                         if comments is not None]
+        rows = [comment_row(post_id, c) for post_id, comments in with_comments for c in comments]
+        self._transaction([
+            (UPSERT_POST, [{field: record[field] for field in POST_FIELDS} for record, _ in split]),
+            (DELETE_POST_COMMENTS, [(post_id,) for post_id, _ in with_comments]),
+            (INSERT_COMMENT, rows),
+            (COUNT_REPLY, [(row['parent_id'],) for row in rows if row['parent_id']]),
+        ])
+
+    def apply_votes(self, deltas, ballots=None):
+        ballots = ballots or {}
+        self._transaction([
+            (UPDATE_VOTES, [(up, down, post_id) for post_id, (up, down) in deltas.items()]),
+            (UPSERT_BALLOT, [(post_id, user_id, direction)
+                             for (post_id, user_id), direction in ballots.items() if direction]),
+            (DELETE_BALLOT, [key for key, direction in ballots.items() if not direction]),
+        ])
+
+    def load_ballots(self):
+        with self._lock:
+            return [tuple(row) for row in self._conn.execute(SELECT_BALLOTS)]
+
+    def _scan(self, sql, after, key, chunk_size):
+        # The lock is only held per chunk, so the app keeps running meanwhile
+        while True:
+            with self._lock:
+                rows = self._conn.execute(sql, (*after, chunk_size)).fetchall()
+            if not rows:
+                return
+            yield rows
+            after = key(rows[-1])
+
+    def iter_posts(self, chunk_size=CHUNK_SIZE):
+        for rows in self._scan(SELECT_POSTS_AFTER, ('',), lambda row: (row['id'],), chunk_size):
+            yield [dict(row) for row in rows]
+
+    def iter_comments(self, chunk_size=CHUNK_SIZE):
+        for rows in self._scan(SELECT_COMMENTS_AFTER, ('', ''),
+                               lambda row: (row['post_id'], row['path']), chunk_size):
+            yield [dict(row) for row in rows]
+
+    def iter_ballots(self, chunk_size=CHUNK_SIZE):
+        for rows in self._scan(SELECT_BALLOTS_AFTER, ('', ''),
+                               lambda row: (row['post_id'], row['user_id']), chunk_size):
+            yield [tuple(row) for row in rows]
+
+    def add_comments(self, comments):
+        rows = [comment_row(post_id, c) for post_id, c in comments]
+        self._transaction([
+            (INSERT_COMMENT, rows),
+            (COUNT_REPLY, [(row['parent_id'],) for row in rows if row['parent_id']]),
+            (COUNT_COMMENT, [(row['post_id'],) for row in rows]),
+        ])
+
+    def import_posts(self, posts):
+        records = [split_comments(dict(post, comment_count=0))[0] for post in posts]
+        self._transaction([
+            (IMPORT_POST, [{field: record[field] for field in POST_FIELDS} for record in records]),
+        ])
+
+    def import_comments(self, comments):
+        rows = [comment_row(post_id, c) for post_id, c in comments]
+        self._transaction([
+            (IMPORT_COMMENT, rows),
+            (RECOUNT_REPLIES, [(parent_id,) for parent_id in
+                               dict.fromkeys(row['parent_id'] for row in rows if row['parent_id'])]),
+            (RECOUNT_COMMENTS, [(post_id,) for post_id in dict.fromkeys(row['post_id'] for row in rows)]),
+        ])
+
+    def import_ballots(self, ballots):
+        self._transaction([
+            (IMPORT_BALLOT, [ballot for ballot in ballots if ballot[2]]),
+        ])
+
+    def comments_page(self, post_id, cursor=None, limit=COMMENT_PAGE_SIZE):
+        with self._lock:
+            # One extra row tells whether another page follows
+            rows = self._conn.execute(SELECT_COMMENT_PAGE,
+                                      (post_id, cursor or '', limit + 1)).fetchall()
+        items = [Comment.of(row) for row in rows[:limit]]
+        return Page(items, items[-1]['id'] if len(rows) > limit else None)
+
+    def comment_tree(self, post_id, root_id=None, max_depth=MAX_DEPTH, per_parent=PER_PARENT):
+        params = {'post_id': post_id, 'root_id': root_id,
+                  'max_depth': max_depth, 'per_parent': per_parent}
+        with self._lock:
+            return [Comment.of(row) for row in self._conn.execute(SELECT_COMMENT_TREE, params)]
+
+    def get_comment(self, comment_id):
+        with self._lock:
+            row = self._conn.execute(SELECT_COMMENT, (comment_id,)).fetchone()
+        return Comment.of(row) if row is not None else None
+
+    def comment_counts_by_post(self):
+        with self._lock:
+            rows = self._conn.execute(COUNT_COMMENTS_BY_POST).fetchall()
+        counts = {}
+        for post_id, author, count in rows:
+            counts.setdefault(post_id, {})[author] = count
+        return counts
+
+    def load_categories(self):
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(SELECT_CATEGORIES)]
+
+    def save_categories(self, categories):
+        self._transaction([
+            (DELETE_CATEGORIES, [()]),
+            (INSERT_CATEGORY, [dict(category, position=position)
+                               for position, category in enumerate(categories)]),
+        ])
+
+    def is_empty(self):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT NOT EXISTS (SELECT 1 FROM posts) AND NOT EXISTS (SELECT 1 FROM categories)"
+            ).fetchone()
+        return bool(row[0])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_backend(location=None):
+    if not location or location == ':memory:':
+        return MemoryBackend()
+    return SQLiteBackend(location)
+
+
+def seed_if_empty(backend):
+    if backend.is_empty():
+        backend.save_categories(SEED_CATEGORIES)
+        backend.save_posts(SEED_POSTS)
+    return backend
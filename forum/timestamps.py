@@ -0,0 +1,93 @@
+"""Post timestamps as integer epoch milliseconds.
+
+Posts store ``timestamp`` as an ``int`` of milliseconds since the epoch,
+so sorting, range filters and the trending decay are integer arithmetic
+with no date parsing. Text only appears at render time: ``format_ms()``
+turns a timestamp into the display string and memoizes it, since the
+same few timestamps are formatted on every rerun.
+
+Every conversion is in UTC, never the server's local time zone, so a
+timestamp reads the same on every host and a string converts back to the
+millisecond it came from. ``to_ms()`` reads the ``"%Y-%m-%d %H:%M:%S"``
+strings older data was written with as UTC; it is only used where records
+enter storage.
+
+``TimeIndex`` listens to the PostStore and keeps every post id sorted by
+creation time, so "posts in the last 24 hours" is two binary searches and
+a slice, however many posts exist.
+"""
+
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timezone
+from functools import lru_cache
+
+from forum.paging import PAGE_SIZE, Page
+from forum.post_store import PostListener
+
+DISPLAY_FORMAT = "%Y-%m-%d %H:%M:%S"
+HOUR_MS = 3600 * 1000
+DAY_MS = 24 * HOUR_MS
+
+
+def now_ms():
+    return time.time_ns() // 1_000_000
+
+
+def to_ms(value):
+    """Epoch milliseconds from an int, a digit string or a legacy display string."""
+    if isinstance(value, str):
+        if value.isdigit():
+            return int(value)
+        parsed = datetime.strptime(value, DISPLAY_FORMAT).replace(tzinfo=timezone.utc)
+        return int(parsed.timestamp()) * 1000
+    return int(value)
+
+
+@lru_cache(maxsize=4096)
+def format_ms(ms):
+    """Display string (UTC, second precision) for ``ms``."""
+    return datetime.fromtimestamp(ms // 1000, timezone.utc).strftime(DISPLAY_FORMAT)
+
+
+class TimeIndex(PostListener):
+    """Post ids by creation time.
+
+    Entries are ``(timestamp, post_id)`` keys in a sorted list; ranges are
+    half-open, ``start_ms <= timestamp < end_ms``, and come newest first.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._key_of = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _bounds(self, start_ms, end_ms):
+        low = 0 if start_ms is None else bisect_left(self._keys, (start_ms,))
+        high = len(self._keys) if end_ms is None else bisect_left(self._keys, (end_ms,))
+        return low, max(low, high)
+
+    def page(self, start_ms=None, end_ms=None, cursor=None, limit=PAGE_SIZE):
+        """Ids created in ``[start_ms, end_ms)``, newest first; the cursor
+        is the last key returned."""
+        low, high = self._bounds(start_ms, end_ms)
+        if cursor is not None:
+            high = max(low, min(high, bisect_left(self._keys, cursor)))
+        start = max(low, high - limit)
+        keys = self._keys[start:high]
+        return Page([post_id for _, post_id in reversed(keys)],
+                    keys[0] if start > low else None)
+
+    # PostListener
+    def post_added(self, post):
+        key = (post['timestamp'], post['id'])
+        self.post_removed(post)
+        insort(self._keys, key)
+        self._key_of[post['id']] = key
+
+    def post_removed(self, post):
+        key = self._key_of.pop(post['id'], None)
+        if key is not None:
+            del self._keys[bisect_left(self._keys, key)]
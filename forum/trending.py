@@ -0,0 +1,144 @@
+"""Incrementally maintained trending rankings.
+
+``TrendingBoard`` listens to the PostStore and keeps posts ranked as they
+are created and voted on, so the feed never has to sort every post:
+
+* ``top``: net score (upvotes - downvotes), what the feed always showed.
+* ``hot``: Reddit-style hotness. The time term is absolute, so a post's
+  hotness only changes when it is voted on and the ranking can be kept
+  incrementally like ``top``.
+* ``rising``: Hacker News-style gravity decay. Scores depend on the current
+  time, so this ranking is rebuilt lazily, at most every ``decay_ttl``
+  seconds and only when somebody asks for it. In between, new posts and
+  votes are ranked using the same reference time as the last rebuild.
+"""
+
+import math
+import time
+from bisect import bisect_left, bisect_right, insort
+
+from forum.paging import PAGE_SIZE, Page
+from forum.post_store import PostListener
+
+MODES = ('top', 'hot', 'rising')
+
+REDDIT_EPOCH = 1134028003
+HN_GRAVITY = 1.8
+
+
+def hot_score(score, created):
+    order = math.log10(max(abs(score), 1))
+    sign = (score > 0) - (score < 0)
+    return round(sign * order + (created - REDDIT_EPOCH) / 45000, 7)
+
+
+def rising_score(score, created, now):
+    age_hours = max(now - created, 0) / 3600
+    return (score - 1) / (age_hours + 2) ** HN_GRAVITY
+
+
+class RankedSet:
+    """Ids kept sorted by descending score.
+
+    Entries live in a sorted list of ``(-score, id)`` keys, so finding an
+    entry is a binary search and a page is a slice. Inserts
+    and deletes shift the list with a memmove, which stays cheap well past a
+    million entries.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._key_of = {}
+
+    @classmethod
+    def from_scores(cls, scores):
+        ranked = cls()
+        ranked._keys = sorted((-score, item_id) for item_id, score in scores)
+        ranked._key_of = {key[1]: key for key in ranked._keys}
+        return ranked
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, item_id):
+        return item_id in self._key_of
+
+    def update(self, item_id, score):
+        self.discard(item_id)
+        key = (-score, item_id)
+        insort(self._keys, key)
+        self._key_of[item_id] = key
+
+    def discard(self, item_id):
+        key = self._key_of.pop(item_id, None)
+        if key is not None:
+            del self._keys[bisect_left(self._keys, key)]
+
+    def page(self, cursor=None, limit=PAGE_SIZE):
+        start = 0 if cursor is None else bisect_right(self._keys, cursor)
+        keys = self._keys[start:start + limit]
+        more = start + limit < len(self._keys)
+        return Page([item_id for _, item_id in keys], keys[-1] if more else None)
+
+
+class TrendingBoard(PostListener):
+    def __init__(self, decay_ttl=60.0, clock=time.time):
+        self.decay_ttl = decay_ttl
+        self._clock = clock
+        self._top = RankedSet()
+        self._hot = RankedSet()
+        self._created = {}
+        self._net = {}
+        self._rising = None
+        self._rising_at = 0.0
+
+    def __len__(self):
+        return len(self._top)
+
+    def _rank(self, post_id):
+        net = self._net[post_id]
+        created = self._created[post_id]
+        self._top.update(post_id, net)
+        self._hot.update(post_id, hot_score(net, created))
+        if self._rising is not None:
+            self._rising.update(post_id, rising_score(net, created, self._rising_at))
+
+    def post_added(self, post):
+        # Post timestamps are epoch ms (see forum.timestamps); scores use seconds
+        self._created[post['id']] = post['timestamp'] / 1000
+        self._net[post['id']] = post['upvotes'] - post['downvotes']
+        self._rank(post['id'])
+
+    def post_voted(self, post, up, down):
+        if post['id'] in self._net:
+            self._net[post['id']] = post['upvotes'] - post['downvotes']
+            self._rank(post['id'])
+
+    def post_removed(self, post):
+        self._top.discard(post['id'])
+        self._hot.discard(post['id'])
+        self._created.pop(post['id'], None)
+        self._net.pop(post['id'], None)
+        if self._rising is not None:
+            self._rising.discard(post['id'])
+
+    def page(self, cursor=None, limit=PAGE_SIZE, mode='top'):
+        return self._ranking(mode).page(cursor, limit)
+
+    def _ranking(self, mode):
+        if mode == 'top':
+            return self._top
+        if mode == 'hot':
+            return self._hot
+        if mode == 'rising':
+            return self._rising_ranking()
+        raise ValueError(f"unknown trending mode: {mode!r}")
+
+    def _rising_ranking(self):
+        now = self._clock()
+        if self._rising is None or now - self._rising_at >= self.decay_ttl:
+            self._rising = RankedSet.from_scores(
+                (post_id, rising_score(net, self._created[post_id], now))
+                for post_id, net in self._net.items())
+            self._rising_at = now
+        return self._rising
@@ -0,0 +1,129 @@
+"""Per-user profile statistics, maintained incrementally.
+
+``UserStats`` listens to the PostStore and keeps, for every author, their
+karma (net votes on their threads), thread count and comment count, so a
+profile is a dict lookup instead of a scan over the author's posts.
+``level`` is derived from karma on read.
+
+Comments are stored apart from the posts, so the comment counts are
+seeded once from the backend (``load_comment_counts``) and then follow
+the ``post_commented`` events. They are also kept per post and author, so
+``post_removed`` can take a removed thread's comments off their authors'
+counts: a comment counts for as long as its thread is in the store. That
+costs one small dict per commented thread.
+
+``UserStats.rebuild()`` computes the same statistics from scratch and
+``diff()`` lists where two instances disagree; together they check that
+the incremental updates never drift (see
+``SharedForum.check_user_stats``).
+"""
+
+import threading
+
+from forum.post_store import PostListener
+
+# Lowest karma for each level, highest first
+LEVELS = (
+    (1000, "Legend"),
+    (250, "Expert"),
+    (50, "Regular"),
+    (10, "Member"),
+    (float('-inf'), "New User"),
+)
+
+FIELDS = ('karma', 'threads', 'comments')
+
+
+def level_for(karma):
+    return next(name for threshold, name in LEVELS if karma >= threshold)
+
+
+class UserStats(PostListener):
+    def __init__(self):
+        self._stats = {}        # username -> [karma, threads, comments]
+        self._commenters = {}   # post id -> {username: comments on that post}
+        self._lock = threading.Lock()
+
+    def _entry(self, username):
+        entry = self._stats.get(username)
+        if entry is None:
+            entry = self._stats[username] = [0, 0, 0]
+        return entry
+
+    def load_comment_counts(self, counts):
+        """Add ``{post_id: {username: comments}}`` counted outside the post events."""
+        with self._lock:
+            for post_id, authors in counts.items():
+                commenters = self._commenters.setdefault(post_id, {})
+                for username, count in authors.items():
+                    self._entry(username)[2] += count
+                    commenters[username] = commenters.get(username, 0) + count
+
+    # PostListener
+    def post_added(self, post):
+        with self._lock:
+            entry = self._entry(post['author'])
+            entry[0] += post['upvotes'] - post['downvotes']
+            entry[1] += 1
+
+    def post_voted(self, post, up, down):
+        with self._lock:
+            self._entry(post['author'])[0] += up - down
+
+    def post_commented(self, post, comment):
+        author = comment['author']
+        with self._lock:
+            self._entry(author)[2] += 1
+            commenters = self._commenters.setdefault(post['id'], {})
+            commenters[author] = commenters.get(author, 0) + 1
+
+    def post_removed(self, post):
+        with self._lock:
+            entry = self._entry(post['author'])
+            entry[0] -= post['upvotes'] - post['downvotes']
+            entry[1] -= 1
+            for username, count in self._commenters.pop(post['id'], {}).items():
+                self._entry(username)[2] -= count
+
+    # Reads
+    def profile(self, username):
+        """``{'karma', 'threads', 'comments', 'level'}`` for ``username``."""
+        with self._lock:
+            karma, threads, comments = self._stats.get(username, (0, 0, 0))
+        return {'karma': karma, 'threads': threads, 'comments': comments,
+                'level': level_for(karma)}
+
+    def snapshot(self):
+        with self._lock:
+            return {username: tuple(entry) for username, entry in self._stats.items()}
+
+    # Consistency checking
+    @classmethod
+    def rebuild(cls, posts, comment_counts):
+        """Stats computed from scratch from every post and ``{post_id:
+        {username: comments}}``; comments on other posts don't count."""
+        stats = cls()
+        post_ids = set()
+        for post in posts:
+            stats.post_added(post)
+            post_ids.add(post['id'])
+        stats.load_comment_counts({post_id: authors for post_id, authors in comment_counts.items()
+                                   if post_id in post_ids})
+        return stats
+
+    def diff(self, other):
+        """``{username: (ours, theirs)}`` for every user whose stats differ."""
+        ours, theirs = self.snapshot(), other.snapshot()
+        empty = (0,) * len(FIELDS)
+        return {username: (ours.get(username, empty), theirs.get(username, empty))
+                for username in ours.keys() | theirs.keys()
+                if ours.get(username, empty) != theirs.get(username, empty)}
+
+    def adopt(self, other):
+        """Replace these stats with ``other``'s, e.g. a rebuild after a mismatch."""
+        stats = {username: list(entry) for username, entry in other.snapshot().items()}
+        with other._lock:
+            commenters = {post_id: dict(authors) for post_id, authors in other._commenters.items()}
+        with self._lock:
+            self._stats = stats
+            self._commenters = commenters
@@ -0,0 +1,171 @@
+"""Per-user vote ledger: one up, down or no vote per user per post.
+
+Voters are numbered densely as they first appear, and each post keeps two
+``RoaringBitmap`` sets of voter numbers (up and down). A roaring bitmap
+splits 32-bit numbers by their high 16 bits into containers holding the
+low 16 bits: a sorted ``array('H')`` while a container has at most 4096
+entries (2 bytes per vote), a fixed 8 KiB bitmap above that. Membership is
+a dict lookup plus either a bit test or a binary search over at most 4096
+entries, so checks stay O(1) however many votes exist.
+
+A bloom filter in front would not save anything here: the exact lookup is
+already constant time, and a bloom miss would still need it to tell a
+retract from a first vote.
+"""
+
+import threading
+from array import array
+from bisect import bisect_left
+
+from forum.post_store import PostListener
+
+ARRAY_LIMIT = 4096
+BITMAP_BYTES = 1 << 13
+
+UP = 1
+DOWN = -1
+NONE = 0
+
+
+class RoaringBitmap:
+    __slots__ = ('_containers', '_cardinality', '_size')
+
+    def __init__(self, values=()):
+        self._containers = {}    # high 16 bits -> array('H') or bytearray bitmap
+        self._cardinality = {}   # high 16 bits -> entries in that container
+        self._size = 0
+        for value in values:
+            self.add(value)
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, value):
+        container = self._containers.get(value >> 16)
+        if container is None:
+            return False
+        low = value & 0xFFFF
+        if isinstance(container, bytearray):
+            return bool(container[low >> 3] & (1 << (low & 7)))
+        i = bisect_left(container, low)
+        return i < len(container) and container[i] == low
+
+    def __iter__(self):
+        for high in sorted(self._containers):
+            for low in self._lows(self._containers[high]):
+                yield (high << 16) | low
+
+    @staticmethod
+    def _lows(container):
+        if isinstance(container, bytearray):
+            return (low for low in range(1 << 16) if container[low >> 3] & (1 << (low & 7)))
+        return iter(container)
+
+    def add(self, value):
+        high, low = value >> 16, value & 0xFFFF
+        container = self._containers.get(high)
+        if container is None:
+            container = self._containers[high] = array('H')
+            self._cardinality[high] = 0
+        if isinstance(container, bytearray):
+            byte, bit = low >> 3, 1 << (low & 7)
+            if container[byte] & bit:
+                return False
+            container[byte] |= bit
+        else:
+            i = bisect_left(container, low)
+            if i < len(container) and container[i] == low:
+                return False
+            container.insert(i, low)
+            if len(container) > ARRAY_LIMIT:
+                bitmap = bytearray(BITMAP_BYTES)
+                for entry in container:
+                    bitmap[entry >> 3] |= 1 << (entry & 7)
+                self._containers[high] = bitmap
+        self._cardinality[high] += 1
+        self._size += 1
+        return True
+
+    def discard(self, value):
+        high, low = value >> 16, value & 0xFFFF
+        container = self._containers.get(high)
+        if container is None:
+            return False
+        if isinstance(container, bytearray):
+            byte, bit = low >> 3, 1 << (low & 7)
+            if not container[byte] & bit:
+                return False
+            container[byte] &= ~bit
+        else:
+            i = bisect_left(container, low)
+            if i == len(container) or container[i] != low:
+                return False
+            del container[i]
+        self._size -= 1
+        remaining = self._cardinality[high] = self._cardinality[high] - 1
+        if not remaining:
+            del self._containers[high]
+            del self._cardinality[high]
+        elif isinstance(container, bytearray) and remaining <= ARRAY_LIMIT // 2:
+            # Go back to the sparse form, with hysteresis to avoid flapping
+            self._containers[high] = array('H', self._lows(container))
+        return True
+
+
+class VoteLedger(PostListener):
+    def __init__(self):
+        self._voters = {}      # user id -> voter number
+        self._up = {}          # post id -> RoaringBitmap of voter numbers
+        self._down = {}
+        self._lock = threading.Lock()
+
+    def _voter(self, user_id):
+        number = self._voters.get(user_id)
+        if number is None:
+            number = self._voters[user_id] = len(self._voters)
+        return number
+
+    def _get(self, post_id, voter):
+        if voter in self._up.get(post_id, ()):
+            return UP
+        if voter in self._down.get(post_id, ()):
+            return DOWN
+        return NONE
+
+    def vote_of(self, post_id, user_id):
+        voter = self._voters.get(user_id)
+        if voter is None:
+            return NONE
+        with self._lock:
+            return self._get(post_id, voter)
+
+    def cast(self, post_id, user_id, direction):
+        """Record ``user_id``'s vote (UP, DOWN or NONE to retract).
+
+        Returns the ``(up, down)`` change to apply to the post's counters,
+        ``(0, 0)`` if the user had already voted that way.
+        """
+        if direction not in (UP, DOWN, NONE):
+            raise ValueError(f"invalid vote direction: {direction!r}")
+        with self._lock:
+            voter = self._voter(user_id)
+            previous = self._get(post_id, voter)
+            if previous == direction:
+                return 0, 0
+            if previous == UP:
+                self._up[post_id].discard(voter)
+            elif previous == DOWN:
+                self._down[post_id].discard(voter)
+            if direction == UP:
+                self._up.setdefault(post_id, RoaringBitmap()).add(voter)
+            elif direction == DOWN:
+                self._down.setdefault(post_id, RoaringBitmap()).add(voter)
+        return (direction == UP) - (previous == UP), (direction == DOWN) - (previous == DOWN)
+
+    def forget_post(self, post_id):
+        with self._lock:
+            self._up.pop(post_id, None)
+            self._down.pop(post_id, None)
+
+    def post_removed(self, post):
+        self.forget_post(post['id'])
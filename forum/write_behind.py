@@ -0,0 +1,169 @@
+"""Write-behind buffers in front of a storage backend.
+
+``WriteBehind`` collects writes in memory and hands them to the backend in
+batches: on a timer, as soon as ``max_pending`` writes are waiting, on an
+explicit ``flush()``, and when the interpreter exits. Subclasses decide how
+writes are buffered (``_buffer``/``_take``) and stored (``_write``).
+
+``VoteQueue`` coalesces vote deltas per post, so a thread upvoted a
+thousand times between flushes costs a single UPDATE, and keeps only the
+latest ballot per user and post. Readers that go to the backend directly
+can add ``pending()`` to what they read.
+
+``CommentQueue`` batches new comments, with the reply and comment counts
+they imply, into one transaction per flush. ``pending(post_id)`` counts a
+post's comments until they are actually stored, so a reader can
+``flush()`` first when it needs to see them.
+"""
+
+import atexit
+import logging
+import threading
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehind:
+    def __init__(self, flush_interval=1.0, max_pending=1000):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._pending_count = 0
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _buffer(self, item):
+        raise NotImplementedError
+
+    def _take(self):
+        raise NotImplementedError
+
+    def _restore(self, batch):
+        raise NotImplementedError
+
+    def _write(self, batch):
+        raise NotImplementedError
+
+    def add(self, item):
+        with self._lock:
+            self._buffer(item)
+            self._pending_count += 1
+            full = self._pending_count >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of writes."""
+        with self._flush_lock:
+            with self._lock:
+                batch, count = self._take(), self._pending_count
+                self._pending_count = 0
+            if not count:
+                return 0
+            try:
+                self._write(batch)
+            except Exception:
+                # Keep the batch so the next flush retries it
+                with self._lock:
+                    self._restore(batch)
+                    self._pending_count += count
+                raise
+            return count
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("%s flush failed; will retry", type(self).__name__)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+        atexit.unregister(self.close)
+
+
+class VoteQueue(WriteBehind):
+    def __init__(self, backend, **kwargs):
+        self.backend = backend
+        self._deltas = {}
+        self._ballots = {}
+        super().__init__(**kwargs)
+
+    def vote(self, post_id, up=0, down=0, user_id=None, direction=None):
+        """Queue a vote delta, and the user's new ballot when ``user_id`` is given."""
+        self.add((post_id, up, down, user_id, direction))
+
+    def _buffer(self, item):
+        post_id, up, down, user_id, direction = item
+        pending_up, pending_down = self._deltas.get(post_id, (0, 0))
+        self._deltas[post_id] = (pending_up + up, pending_down + down)
+        if user_id is not None:
+            self._ballots[(post_id, user_id)] = direction
+
+    def _take(self):
+        batch = self._deltas, self._ballots
+        self._deltas, self._ballots = {}, {}
+        return batch
+
+    def _restore(self, batch):
+        deltas, ballots = batch
+        for post_id, (up, down) in deltas.items():
+            self._buffer((post_id, up, down, None, None))
+        # Ballots queued after the failed batch are newer and win
+        for key, direction in ballots.items():
+            self._ballots.setdefault(key, direction)
+
+    def _write(self, batch):
+        deltas, ballots = batch
+        self.backend.apply_votes(deltas, ballots)
+
+    def pending(self, post_id):
+        """Vote deltas for ``post_id`` not yet written to the backend."""
+        with self._lock:
+            return self._deltas.get(post_id, (0, 0))
+
+
+class CommentQueue(WriteBehind):
+    def __init__(self, backend, **kwargs):
+        self.backend = backend
+        self._comments = []
+        self._by_post = Counter()   # buffered or being written
+        super().__init__(**kwargs)
+
+    def comment(self, post_id, comment):
+        self.add((post_id, comment))
+
+    def _buffer(self, item):
+        self._comments.append(item)
+        self._by_post[item[0]] += 1
+
+    def _take(self):
+        batch, self._comments = self._comments, []
+        return batch
+
+    def _restore(self, batch):
+        # Older than anything queued since; replies must follow their parents
+        self._comments[:0] = batch
+
+    def _write(self, batch):
+        self.backend.add_comments(batch)
+        with self._lock:
+            self._by_post.subtract(post_id for post_id, _ in batch)
+            self._by_post += Counter()   # drop zero counts
+
+    def pending(self, post_id):
+        """Comments on ``post_id`` not yet stored by the backend."""
+        with self._lock:
+            return self._by_post[post_id]
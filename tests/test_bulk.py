@@ -0,0 +1,88 @@
+"""Dump round trips through ``forum.bulk``."""
+
+import pytest
+
+from forum.bulk import export_dump, import_dump
+from forum.storage import MemoryBackend, SQLiteBackend
+from forum.timestamps import now_ms
+
+
+def make_backend(kind, tmp_path, name):
+    if kind == 'sqlite':
+        return SQLiteBackend(str(tmp_path / f'{name}.db'))
+    return MemoryBackend()
+
+
+def populate(backend):
+    now = now_ms()
+    backend.save_posts({
+        'id': f'p{i}', 'category_id': '1', 'title': f'Post {i}', 'content': '<b>hi</b>',
+        'author': f'user_{i % 3}', 'timestamp': now - i * 60_000,
+        'upvotes': 0, 'downvotes': 0,
+    } for i in range(5))
+    backend.add_comments([
+        ('p0', {'id': 'c1', 'author': 'user_1', 'content': 'first'}),
+        ('p0', {'id': 'c2', 'author': 'user_2', 'content': 'reply', 'parent_id': 'c1'}),
+        ('p0', {'id': 'c3', 'author': 'user_0', 'content': 'nested', 'parent_id': 'c2'}),
+        ('p0', {'id': 'c4', 'author': 'user_0', 'content': 'second reply', 'parent_id': 'c1'}),
+        ('p1', {'id': 'c5', 'author': 'user_1', 'content': 'other thread', 'score': 3}),
+    ])
+    backend.apply_votes({'p0': (2, 0), 'p1': (0, 1)},
+                        {('p0', 'user_1'): 1, ('p0', 'user_2'): 1, ('p1', 'user_0'): -1})
+
+
+def snapshot(backend):
+    posts = sorted((post['id'], post['title'], post['upvotes'], post['downvotes'],
+                    post['comment_count']) for chunk in backend.iter_posts() for post in chunk)
+    comments = sorted((comment['id'], comment['post_id'], comment['parent_id'], comment['content'],
+                       comment['score'], comment['reply_count'])
+                      for chunk in backend.iter_comments() for comment in chunk)
+    ballots = sorted(ballot for chunk in backend.iter_ballots() for ballot in chunk)
+    return posts, comments, ballots
+
+
+@pytest.mark.parametrize('kind', ['memory', 'sqlite'])
+def test_reimport_keeps_existing_records(kind, tmp_path):
+    source = make_backend(kind, tmp_path, 'source')
+    populate(source)
+    expected = snapshot(source)
+    export_dump(source, str(tmp_path / 'dump'))
+
+    target = make_backend(kind, tmp_path, 'target')
+    import_dump(target, str(tmp_path / 'dump'))
+    assert snapshot(target) == expected
+
+    # Activity after the first import survives loading the dump again
+    target.apply_votes({'p2': (1, 0)}, {('p2', 'user_1'): 1})
+    target.add_comments([('p2', {'id': 'c6', 'author': 'user_1', 'content': 'new'})])
+    changed = snapshot(target)
+    import_dump(target, str(tmp_path / 'dump'))
+    import_dump(target, str(tmp_path / 'dump'), kinds=('posts',))
+    assert snapshot(target) == changed
+
+    # Loading a dump into the database it was taken from changes nothing
+    import_dump(source, str(tmp_path / 'dump'))
+    assert snapshot(source) == expected
+
+    for backend in (source, target):
+        backend.close()
+
+
+@pytest.mark.parametrize('kind', ['memory', 'sqlite'])
+def test_import_adds_missing_comments_to_stored_threads(kind, tmp_path):
+    source = make_backend(kind, tmp_path, 'source')
+    populate(source)
+    export_dump(source, str(tmp_path / 'dump'))
+
+    target = make_backend(kind, tmp_path, 'target')
+    import_dump(target, str(tmp_path / 'dump'), kinds=('categories', 'posts'))
+    target.add_comments([('p0', {'id': 'c1', 'author': 'user_1', 'content': 'first'})])
+    import_dump(target, str(tmp_path / 'dump'), kinds=('comments',))
+
+    posts, comments, _ = snapshot(target)
+    assert dict((post[0], post[4]) for post in posts)['p0'] == 4
+    assert dict((comment[0], comment[5]) for comment in comments) == {
+        'c1': 2, 'c2': 1, 'c3': 0, 'c4': 0, 'c5': 0}
+
+    for backend in (source, target):
+        backend.close()
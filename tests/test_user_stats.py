@@ -0,0 +1,62 @@
+"""The incremental user stats against a rebuild from the stored data."""
+
+import random
+
+import pytest
+
+from forum.shared import SharedForum
+from forum.storage import MemoryBackend, SQLiteBackend
+from forum.timestamps import now_ms
+
+AUTHORS = [f'user_{i}' for i in range(20)]
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def shared(request, tmp_path):
+    rng = random.Random(22)
+    if request.param == 'sqlite':
+        backend = SQLiteBackend(str(tmp_path / 'forum.db'))
+    else:
+        backend = MemoryBackend()
+    now = now_ms()
+    backend.save_posts({
+        'id': str(i), 'category_id': str(i % 4 + 1), 'title': f'Post {i}', 'content': '',
+        'author': rng.choice(AUTHORS), 'timestamp': now - i * 60_000,
+        'upvotes': rng.randrange(20), 'downvotes': rng.randrange(5), 'comment_count': 0,
+    } for i in range(200))
+    shared = SharedForum(backend)
+    yield shared
+    shared.vote_queue.close()
+    shared.comment_queue.close()
+    backend.close()
+
+
+def test_no_drift_after_votes_comments_and_removals(shared):
+    rng = random.Random(23)
+    live = [post['id'] for post in shared.posts]
+    for _ in range(2000):
+        op = rng.choices(('vote', 'comment', 'remove'), weights=(70, 27, 3))[0]
+        i = rng.randrange(len(live))
+        if op == 'vote':
+            shared.cast_votes({(live[i], rng.choice(AUTHORS)): rng.choice((1, -1, 0))})
+        elif op == 'comment':
+            shared.add_comment(live[i], rng.choice(AUTHORS), "test comment")
+        else:
+            # Removed threads take their votes and comments off their users
+            shared.posts.remove(live[i])
+            live[i] = live[-1]
+            live.pop()
+    assert shared.check_user_stats() == {}
+
+
+def test_check_finds_and_repairs_drift(shared):
+    victim = next(iter(shared.posts))['author']
+    shared.user_stats.post_voted({'author': victim}, 1, 0)
+    mismatches = shared.check_user_stats()
+    assert set(mismatches) == {victim}
+    incremental, rebuilt = mismatches[victim]
+    assert incremental != rebuilt
+
+    assert shared.check_user_stats(repair=True) == mismatches
+    assert shared.check_user_stats() == {}
+    assert shared.profile(victim) == shared.user_stats.profile(victim)